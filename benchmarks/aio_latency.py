@@ -0,0 +1,104 @@
+"""Measure latency of parsing requests and stalls of the event loop when
+files are parsed inline, in threads, and in processes with
+guitarpro.aio."""
+
+from __future__ import division, print_function
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import guitarpro
+from guitarpro import aio
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+async def parseInline(data):
+    return guitarpro.parse(data)
+
+
+async def heartbeat(interval, stalls, stop):
+    """Record how late the event loop wakes up a sleeping task."""
+    loop = asyncio.get_event_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        stalls.append(loop.time() - expected)
+
+
+async def request(parse, data, latencies):
+    start = time.perf_counter()
+    await parse(data)
+    latencies.append(time.perf_counter() - start)
+
+
+async def load(parse, data, requests, concurrency):
+    """Issue *requests* parses with at most *concurrency* in flight."""
+    latencies = []
+    stalls = []
+    stop = asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(0.005, stalls, stop))
+    pending = set()
+    start = time.perf_counter()
+    for _ in range(requests):
+        if len(pending) >= concurrency:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        pending.add(asyncio.ensure_future(request(parse, data, latencies)))
+    await asyncio.wait(pending)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return elapsed, latencies, stalls
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main(filename, requests, concurrency, workers):
+    path = os.path.join(LOCATION, filename)
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    modes = [
+        ('inline', parseInline, None),
+        ('threads', aio.parse, None),
+        ('processes', aio.parse, ProcessPoolExecutor(workers)),
+    ]
+    print('{:<10} {:>8} {:>8} {:>8} {:>10}'.format('mode', 'req/s', 'p50', 'p99', 'max stall'))
+    for name, parse, executor in modes:
+        aio.configure(executor, limit=workers)
+        loop = asyncio.new_event_loop()
+        try:
+            elapsed, latencies, stalls = loop.run_until_complete(load(parse, data, requests, concurrency))
+        finally:
+            loop.close()
+            if executor is not None:
+                executor.shutdown()
+        print('{:<10} {:>8.1f} {:>6.0f}ms {:>6.0f}ms {:>8.0f}ms'.format(
+            name, requests / elapsed, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000,
+            max(stalls or [0]) * 1000))
+    aio.configure()
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark parsing under concurrent load in an asyncio event loop."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-f', '--filename',
+                        default='Mastodon - Curl of the Burl.gp5',
+                        help='name of the tab in tests folder')
+    parser.add_argument('-n', '--requests',
+                        type=int, default=50,
+                        help='number of parse requests')
+    parser.add_argument('-c', '--concurrency',
+                        type=int, default=10,
+                        help='number of requests in flight')
+    parser.add_argument('-w', '--workers',
+                        type=int, default=os.cpu_count(),
+                        help='number of worker processes and the concurrency limit')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
@@ -0,0 +1,98 @@
+"""Compare copying and pickling of songs against stock copy.deepcopy and
+pickle that follow references to parent models."""
+
+from __future__ import division, print_function
+
+import copy
+import glob
+import os
+import pickle
+import sys
+import timeit
+
+import attr
+
+import guitarpro
+from guitarpro import models as gp
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+def stockGetstate(self):
+    return tuple(getattr(self, field.name) for field in attr.fields(self.__class__))
+
+
+def stockSetstate(self, state):
+    for field, value in zip(attr.fields(self.__class__), state):
+        object.__setattr__(self, field.name, value)
+
+
+class stockPickling(object):
+
+    """Restore pickling and copying as they were before songs were
+    pickled as snapshots and models without parents."""
+
+    def __enter__(self):
+        self.saved = {}
+        for cls in (gp.Song, gp.MeasureHeader, gp.Track, gp.Measure, gp.Voice, gp.Beat, gp.Note):
+            self.saved[cls] = {name: cls.__dict__[name] for name in
+                               ('__getstate__', '__setstate__', '__reduce__', '__copy__', '__deepcopy__')
+                               if name in cls.__dict__}
+            for name in self.saved[cls]:
+                delattr(cls, name)
+            if hasattr(cls, '__slots__'):
+                # attrs gives slotted classes methods that save all fields
+                cls.__getstate__ = stockGetstate
+                cls.__setstate__ = stockSetstate
+
+    def __exit__(self, *exc_info):
+        for cls, methods in self.saved.items():
+            for name in ('__getstate__', '__setstate__'):
+                if name in cls.__dict__:
+                    delattr(cls, name)
+            for name, method in methods.items():
+                setattr(cls, name, method)
+
+
+def measure(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main(pattern, repeat):
+    # Stock pickling recurses through every parent pointer
+    sys.setrecursionlimit(100000)
+    paths = sorted(glob.glob(os.path.join(LOCATION, pattern)))
+    songs = [guitarpro.parse(path) for path in paths]
+    protocol = pickle.HIGHEST_PROTOCOL
+    results = []
+    with stockPickling():
+        dumped = [pickle.dumps(song, protocol) for song in songs]
+        results.append(('stock deepcopy', measure(lambda: [copy.deepcopy(song) for song in songs], repeat), None))
+        results.append(('stock dumps', measure(lambda: [pickle.dumps(song, protocol) for song in songs], repeat),
+                        sum(map(len, dumped))))
+        results.append(('stock loads', measure(lambda: [pickle.loads(data) for data in dumped], repeat), None))
+    dumped = [pickle.dumps(song, protocol) for song in songs]
+    assert [pickle.loads(data) for data in dumped] == songs
+    results.append(('clone', measure(lambda: [song.clone() for song in songs], repeat), None))
+    results.append(('deepcopy', measure(lambda: [copy.deepcopy(song) for song in songs], repeat), None))
+    results.append(('dumps', measure(lambda: [pickle.dumps(song, protocol) for song in songs], repeat),
+                    sum(map(len, dumped))))
+    results.append(('loads', measure(lambda: [pickle.loads(data) for data in dumped], repeat), None))
+    print('{} songs'.format(len(songs)))
+    for name, time, size in results:
+        print('{:<15} {:>8.2f}ms {:>10}'.format(name, time * 1000, size or ''))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark copying and pickling of every tab in tests folder."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-p', '--pattern',
+                        default='*.gp[345]',
+                        help='glob pattern of tabs in tests folder')
+    parser.add_argument('-r', '--repeat',
+                        type=int, default=3,
+                        help='number of measurements')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
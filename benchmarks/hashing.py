@@ -0,0 +1,83 @@
+"""Compare hashing of songs without copying models against the previous
+implementation that copied models with list attributes."""
+
+from __future__ import division, print_function
+
+import glob
+import os
+import timeit
+
+import attr
+
+import guitarpro
+from guitarpro import models as gp
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+def copyingHash(self):
+    """Hash of a model as it was implemented before, hashing the same
+    attributes as the current implementation."""
+    obj = self
+    for field in attr.fields(self.__class__):
+        value = getattr(self, field.name)
+        if isinstance(value, (list, set)):
+            new_value = tuple(value)
+        else:
+            new_value = value
+        if new_value != value:
+            obj = attr.assoc(obj, **{field.name: new_value})
+    return hash(attr.astuple(obj, recurse=False, filter=lambda a, v: gp._isHashed(a)))
+
+
+def hashableClasses():
+    return [cls for cls in vars(gp).values()
+            if isinstance(cls, type) and attr.has(cls) and cls.__hash__ is not None]
+
+
+def hashAll(songs):
+    for song in songs:
+        hash(song)
+
+
+def main(pattern, repeat):
+    paths = sorted(glob.glob(os.path.join(LOCATION, pattern)))
+    songs = [guitarpro.parse(path) for path in paths]
+    internedSongs = [guitarpro.parse(path, intern=True) for path in paths]
+    current = {cls: cls.__hash__ for cls in hashableClasses()}
+    hashes = [hash(song) for song in songs]
+
+    copyings = []
+    currents = []
+    interneds = []
+    for _ in range(repeat):
+        for cls in current:
+            cls.__hash__ = copyingHash
+        try:
+            assert [hash(song) for song in songs] == hashes
+            copyings.append(timeit.timeit(lambda: hashAll(songs), number=1))
+        finally:
+            for cls, hash_ in current.items():
+                cls.__hash__ = hash_
+        currents.append(timeit.timeit(lambda: hashAll(songs), number=1))
+        interneds.append(timeit.timeit(lambda: hashAll(internedSongs), number=1))
+    copying = min(copyings)
+    print('{} songs'.format(len(songs)))
+    print('{:<10} {:>8.2f}ms'.format('copying', copying * 1000))
+    print('{:<10} {:>8.2f}ms {:>6.2f}x'.format('current', min(currents) * 1000, copying / min(currents)))
+    print('{:<10} {:>8.2f}ms {:>6.2f}x'.format('interned', min(interneds) * 1000, copying / min(interneds)))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark hashing of every tab in tests folder."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-p', '--pattern',
+                        default='*.gp[345]',
+                        help='glob pattern of tabs in tests folder')
+    parser.add_argument('-r', '--repeat',
+                        type=int, default=5,
+                        help='number of measurements')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
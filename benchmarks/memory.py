@@ -0,0 +1,103 @@
+"""Compare memory taken by parsed songs with slotted models against
+models that store attributes in instance dictionaries."""
+
+from __future__ import division, print_function
+
+import contextlib
+import gc
+import glob
+import os
+import tracemalloc
+from collections import OrderedDict
+
+import attr
+
+import guitarpro
+from guitarpro import models as gp
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+SLOTTED = ['Tuplet', 'Duration', 'Measure', 'Voice', 'BeatStroke', 'BeatEffect', 'BeatDisplay', 'Beat',
+           'NoteEffect', 'Note']
+
+
+def unslotted(cls, clones):
+    """Make a copy of slotted attrs class that stores attributes in
+    instance dictionary.
+
+    Factories of attribute defaults that create classes in *clones* are
+    replaced with the clones.
+    """
+    namespace = {name: value for name, value in vars(cls).items()
+                 if name not in ('__slots__', '__weakref__', '__attrs_attrs__') and
+                 not isinstance(value, type(gp.Note.value))}
+    these = OrderedDict()
+    for field in attr.fields(cls):
+        default = field.default
+        if isinstance(default, attr.Factory) and default.factory in clones:
+            default = attr.Factory(clones[default.factory])
+        these[field.name] = attr.ib(default=default, init=field.init, repr=field.repr, eq=field.eq,
+                                    order=field.order, hash=field.hash)
+    clone = attr.s(these=these, hash=False)(type(cls.__name__, cls.__bases__, namespace))
+    clone.__hash__ = cls.__hash__
+    return clone
+
+
+@contextlib.contextmanager
+def dictModels():
+    """Replace slotted models with their unslotted copies."""
+    originals = OrderedDict((name, getattr(gp, name)) for name in SLOTTED)
+    clones = {}
+    for name, cls in originals.items():
+        clones[cls] = unslotted(cls, clones)
+        setattr(gp, name, clones[cls])
+    try:
+        yield
+    finally:
+        for name, cls in originals.items():
+            setattr(gp, name, cls)
+
+
+def measure(path):
+    gc.collect()
+    tracemalloc.start()
+    song = guitarpro.parse(path)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    notes = sum(len(beat.notes)
+                for track in song.tracks
+                for measure in track.measures
+                for voice in measure.voices
+                for beat in voice.beats)
+    return size, notes
+
+
+def main(pattern):
+    paths = sorted(glob.glob(os.path.join(LOCATION, pattern)))
+    totalDict = totalSlots = totalNotes = 0
+    print('{:<45} {:>6} {:>10} {:>10} {:>8}'.format('file', 'notes', 'dict', 'slots', 'saved'))
+    for path in paths:
+        with dictModels():
+            dictSize, notes = measure(path)
+        slotsSize, _ = measure(path)
+        if not notes:
+            continue
+        totalDict += dictSize
+        totalSlots += slotsSize
+        totalNotes += notes
+        print('{:<45} {:>6} {:>8.0f}B {:>8.0f}B {:>7.0%}'.format(
+            os.path.basename(path)[:45], notes, dictSize / notes, slotsSize / notes, 1 - slotsSize / dictSize))
+    print('{:<45} {:>6} {:>8.0f}B {:>8.0f}B {:>7.0%}'.format(
+        'total', totalNotes, totalDict / totalNotes, totalSlots / totalNotes, 1 - totalSlots / totalDict))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark memory taken by parsed tabs, in bytes per note."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-p', '--pattern',
+                        default='*.gp[345]',
+                        help='glob pattern of tabs in tests folder')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
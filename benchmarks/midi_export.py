@@ -0,0 +1,85 @@
+"""Measure export of a long song with many tracks into a MIDI file.
+
+The song is made of the tab repeated until it lasts *minutes* and of
+its tracks repeated until there are *tracks* of them."""
+
+from __future__ import division, print_function
+
+import math
+import os
+import timeit
+
+import guitarpro
+from guitarpro import midi
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+def shiftedCopy(song, shift):
+    copy = song.clone()
+    for header in copy.measureHeaders:
+        header.start += shift
+    for track in copy.tracks:
+        for measure in track.measures:
+            for voice in measure.voices:
+                for beat in voice.beats:
+                    beat.start += shift
+    return copy
+
+
+def longSong(song, minutes, trackCount):
+    length = sum(header.length for header in song.measureHeaders)
+    seconds = length / guitarpro.Duration.quarterTime * 60 / song.tempo
+    repeats = int(math.ceil(minutes * 60 / seconds))
+    result = song.clone()
+    for repeat in range(1, repeats):
+        copy = shiftedCopy(song, length * repeat)
+        for header in copy.measureHeaders:
+            result.addMeasureHeader(header)
+        for track, copiedTrack in zip(result.tracks, copy.tracks):
+            for measure in copiedTrack.measures:
+                measure.track = track
+                track.measures.append(measure)
+    tracks = list(result.tracks)
+    while len(result.tracks) < trackCount:
+        copy = result.clone()
+        for track in copy.tracks[:trackCount - len(result.tracks)]:
+            track.song = result
+            track.number = len(result.tracks) + 1
+            for measure, header in zip(track.measures, result.measureHeaders):
+                measure.header = header
+            result.tracks.append(track)
+    assert result.tracks[:len(tracks)] == tracks
+    return result, repeats * seconds
+
+
+def main(filename, minutes, tracks, repeat):
+    song = guitarpro.parse(os.path.join(LOCATION, filename))
+    song, seconds = longSong(song, minutes, tracks)
+    notes = sum(len(beat.notes) for track in song.tracks for measure in track.measures
+                for voice in measure.voices for beat in voice.beats)
+    time = min(timeit.repeat(lambda: midi.export(song), number=1, repeat=repeat))
+    size = len(midi.export(song))
+    print('{:.1f} minutes, {} tracks, {} notes'.format(seconds / 60, len(song.tracks), notes))
+    print('exported in {:.0f}ms, {} bytes, {:.0f} notes/s'.format(time * 1000, size, notes / time))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark MIDI export of a long song."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-f', '--filename',
+                        default='Mastodon - Curl of the Burl.gp5',
+                        help='name of the tab in tests folder')
+    parser.add_argument('-m', '--minutes',
+                        type=float, default=10,
+                        help='length of the song')
+    parser.add_argument('-t', '--tracks',
+                        type=int, default=12,
+                        help='number of tracks')
+    parser.add_argument('-r', '--repeat',
+                        type=int, default=3,
+                        help='number of measurements')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
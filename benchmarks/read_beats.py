@@ -0,0 +1,81 @@
+"""Compare beat lookup by start time that checks the last beat of the
+voice first against the previous reverse scan of the voice."""
+
+from __future__ import division, print_function
+
+import os
+import timeit
+
+import guitarpro
+from guitarpro import models as gp
+from guitarpro.io import getVersionAndGPFile
+from guitarpro.iobase import GPFileBase
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+class ScanBeatMixin(object):
+
+    """Beat lookup as it was implemented before."""
+
+    def getBeat(self, voice, start):
+        for beat in reversed(voice.beats):
+            if beat.start == start:
+                return beat
+        newBeat = gp.Beat(voice)
+        newBeat.start = start
+        voice.beats.append(newBeat)
+        return newBeat
+
+
+def parseScan(data, encoding='cp1252'):
+    versionString = GPFileBase(data, encoding).readVersion()
+    version, GPFile = getVersionAndGPFile(versionString)
+    ScanGPFile = type('Scan' + GPFile.__name__, (ScanBeatMixin, GPFile), {})
+    gpfile = ScanGPFile(data, encoding, versionTuple=version)
+    return gpfile.readSong()
+
+
+def parseCurrent(data, encoding='cp1252'):
+    return guitarpro.parse(data, encoding=encoding)
+
+
+def main(filename, number, repeat):
+    path = os.path.join(LOCATION, filename)
+    with open(path, 'rb') as fp:
+        data = fp.read()
+    assert parseScan(data) == parseCurrent(data)
+    # Alternate measurements, differences are small compared to noise
+    scans = []
+    currents = []
+    for _ in range(repeat):
+        scans.append(timeit.timeit(lambda: parseScan(data), number=number) / number)
+        currents.append(timeit.timeit(lambda: parseCurrent(data), number=number) / number)
+    scan = min(scans)
+    current = min(currents)
+    beats = sum(len(voice.beats)
+                for track in parseCurrent(data).tracks
+                for measure in track.measures
+                for voice in measure.voices)
+    print('{}: {} beats'.format(filename, beats))
+    print('{:<10} {:>8.2f}ms'.format('scan', scan * 1000))
+    print('{:<10} {:>8.2f}ms'.format('current', current * 1000))
+    print('{:<10} {:>8.2f}x'.format('speedup', scan / current))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark beat lookup while reading a tab."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-f', '--filename',
+                        default='Mastodon - Ghost of Karelia.gp5',
+                        help='name of a tab in tests folder')
+    parser.add_argument('-n', '--number',
+                        type=int, default=3,
+                        help='number of parses per measurement')
+    parser.add_argument('-r', '--repeat',
+                        type=int, default=15,
+                        help='number of measurements')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
@@ -0,0 +1,133 @@
+"""Compare primitive readers built on precompiled structs against the
+previous per-field ``stream.read`` + ``struct.unpack`` implementation."""
+
+from __future__ import division, print_function
+
+import glob
+import io
+import os
+import struct
+import timeit
+
+import guitarpro
+from guitarpro.io import getVersionAndGPFile
+from guitarpro.iobase import GPFileBase
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+class StreamReadMixin(object):
+
+    """Primitive readers as they were implemented before."""
+
+    def tell(self):
+        return self.data.tell()
+
+    def seek(self, offset):
+        self.data.seek(offset)
+
+    def skip(self, count):
+        return self.data.read(count)
+
+    def readBytes(self, count):
+        return self.data.read(count)
+
+    def readRecord(self, struct_):
+        return struct_.unpack(self.data.read(struct_.size))
+
+    def readStruct(self, fmt):
+        return struct.unpack(fmt, self.data.read(struct.calcsize(fmt)))
+
+    def read(self, fmt, count, default=None):
+        try:
+            data = self.data.read(count)
+            result = struct.unpack(fmt, data)
+            return result[0]
+        except struct.error:
+            if default is not None:
+                return default
+            else:
+                raise
+
+    def _readMany(self, fmt, size, count, default):
+        return (self.read(fmt, size, default=default) if count == 1 else
+                [self.read(fmt, size, default=default) for i in range(count)])
+
+    def readByte(self, count=1, default=None):
+        return self._readMany('B', 1, count, default)
+
+    def readSignedByte(self, count=1, default=None):
+        return self._readMany('b', 1, count, default)
+
+    def readBool(self, count=1, default=None):
+        return self._readMany('?', 1, count, default)
+
+    def readShort(self, count=1, default=None):
+        return self._readMany('<h', 2, count, default)
+
+    def readInt(self, count=1, default=None):
+        return self._readMany('<i', 4, count, default)
+
+    def readFloat(self, count=1, default=None):
+        return self._readMany('<f', 4, count, default)
+
+    def readDouble(self, count=1, default=None):
+        return self._readMany('<d', 8, count, default)
+
+    def readString(self, size, length=None):
+        if length is None:
+            length = size
+        count = size if size > 0 else length
+        s = self.data.read(count)
+        ss = s[:(length if length >= 0 else size)]
+        return ss.decode(self.encoding)
+
+
+class StreamGPFileBase(StreamReadMixin, GPFileBase):
+    pass
+
+
+def parseLegacy(data, encoding='cp1252'):
+    fp = io.BytesIO(data)
+    versionString = StreamGPFileBase(fp, encoding).readVersion()
+    version, GPFile = getVersionAndGPFile(versionString)
+    LegacyGPFile = type('Stream' + GPFile.__name__, (StreamReadMixin, GPFile), {})
+    gpfile = LegacyGPFile(fp, encoding, version=versionString, versionTuple=version)
+    return gpfile.readSong()
+
+
+def parseCurrent(data, encoding='cp1252'):
+    return guitarpro.parse(io.BytesIO(data), encoding=encoding)
+
+
+def main(pattern, number):
+    paths = sorted(glob.glob(os.path.join(LOCATION, pattern)))
+    totalLegacy = totalCurrent = 0
+    print('{:<45} {:>10} {:>10} {:>8}'.format('file', 'legacy', 'current', 'speedup'))
+    for path in paths:
+        with open(path, 'rb') as fp:
+            data = fp.read()
+        assert parseLegacy(data) == parseCurrent(data)
+        legacy = min(timeit.repeat(lambda: parseLegacy(data), number=number, repeat=3)) / number
+        current = min(timeit.repeat(lambda: parseCurrent(data), number=number, repeat=3)) / number
+        totalLegacy += legacy
+        totalCurrent += current
+        print('{:<45} {:>8.2f}ms {:>8.2f}ms {:>7.2f}x'.format(
+            os.path.basename(path)[:45], legacy * 1000, current * 1000, legacy / current))
+    print('{:<45} {:>8.2f}ms {:>8.2f}ms {:>7.2f}x'.format(
+        'total', totalLegacy * 1000, totalCurrent * 1000, totalLegacy / totalCurrent))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark primitive readers on the test tabs."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-p', '--pattern',
+                        default='*.gp5',
+                        help='glob pattern of tabs in tests folder')
+    parser.add_argument('-n', '--number',
+                        type=int, default=5,
+                        help='number of parses per measurement')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
@@ -0,0 +1,52 @@
+"""Compare loading snapshots of songs against parsing their files."""
+
+from __future__ import division, print_function
+
+import glob
+import os
+import timeit
+
+import guitarpro
+from guitarpro import snapshot
+
+LOCATION = os.path.join(os.path.dirname(__file__), '..', 'tests')
+
+
+def main(pattern, repeat):
+    paths = sorted(glob.glob(os.path.join(LOCATION, pattern)))
+    print('{:<40} {:>9} {:>9} {:>9} {:>9} {:>7}'.format('file', 'size', 'parse', 'dumps', 'loads', 'speedup'))
+    totals = [0, 0, 0]
+    for path in paths:
+        with open(path, 'rb') as fp:
+            data = fp.read()
+        song = guitarpro.parse(data)
+        dumped = snapshot.dumps(song)
+        assert snapshot.loads(dumped) == song
+        number = max(1, int(0.2 / timeit.timeit(lambda: guitarpro.parse(data), number=1)))
+        times = [min(timeit.repeat(function, number=number, repeat=repeat)) / number
+                 for function in (lambda: guitarpro.parse(data),
+                                  lambda: snapshot.dumps(song),
+                                  lambda: snapshot.loads(dumped))]
+        for index, time in enumerate(times):
+            totals[index] += time
+        parse, dumps, loads = times
+        print('{:<40} {:>9} {:>7.2f}ms {:>7.2f}ms {:>7.2f}ms {:>6.2f}x'.format(
+            os.path.basename(path)[:40], len(dumped), parse * 1000, dumps * 1000, loads * 1000, parse / loads))
+    parse, dumps, loads = totals
+    print('{:<40} {:>9} {:>7.2f}ms {:>7.2f}ms {:>7.2f}ms {:>6.2f}x'.format(
+        'total', '', parse * 1000, dumps * 1000, loads * 1000, parse / loads))
+
+
+if __name__ == '__main__':
+    import argparse
+    description = "Benchmark snapshots of every tab in tests folder."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-p', '--pattern',
+                        default='*.gp[345]',
+                        help='glob pattern of tabs in tests folder')
+    parser.add_argument('-r', '--repeat',
+                        type=int, default=3,
+                        help='number of measurements')
+    args = parser.parse_args()
+    kwargs = dict(args._get_kwargs())
+    main(**kwargs)
@@ -2,6 +2,7 @@ from os import path
 from itertools import izip
 
 import guitarpro
+from guitarpro import transform
 
 
 MAPPING = {
@@ -34,11 +35,7 @@ def main(source, dest=None, tracks=None):
 
     for track in tracks:
         # Map values to Genaral MIDI.
-        for measure in track.measures:
-            for voice in measure.voices:
-                for beat in voice.beats:
-                    for note in beat.notes:
-                        note.value = MAPPING.get(note.value, note.value)
+        transform.remap(song, MAPPING, tracks=[track.number])
 
         # Extend note durations to remove rests in-between.
         voiceparts = izip(*(measure.voices for measure in track.measures))
@@ -10,21 +10,22 @@ def main(source):
     print("Filtering...\n")
     supportedExtensions = '*.gp[345]'
 
-    for dirpath, dirs, files in os.walk(source):
-        for file in fnmatch.filter(files, supportedExtensions):
-            guitarProPath = os.path.join(dirpath, file)
-            try:
-                tab = guitarpro.parse(guitarProPath)
-            except guitarpro.GPException as exception:
-                print("###This is not a supported GuitarPro file:", guitarProPath, ":", exception)
-            else:
-                for track in tab.tracks:
-                    if not track.isPercussionTrack:
-                        if len(track.strings) == 5:
-                            print(guitarProPath)
+    paths = (os.path.join(dirpath, file)
+             for dirpath, dirs, files in os.walk(source)
+             for file in fnmatch.filter(files, supportedExtensions))
+    for guitarProPath, result in guitarpro.parse_many(paths, reducer=countFiveStringTracks, depth='tracks'):
+        if isinstance(result, Exception):
+            print("###This is not a supported GuitarPro file:", guitarProPath, ":", result)
+        else:
+            for _ in range(result):
+                print(guitarProPath)
     print("\nDone!")
 
 
+def countFiveStringTracks(tab):
+    return sum(1 for track in tab.tracks if not track.isPercussionTrack and len(track.strings) == 5)
+
+
 if __name__ == '__main__':
     import argparse
     description = "List Guitar Pro files containing 5 string bass track."
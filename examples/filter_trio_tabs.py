@@ -10,16 +10,14 @@ def main(source):
     print("Filtering...\n")
     supportedExtensions = '*.gp[345]'
 
-    for dirpath, dirs, files in os.walk(source):
-        for file in fnmatch.filter(files, supportedExtensions):
-            guitarProPath = os.path.join(dirpath, file)
-            try:
-                tab = guitarpro.parse(guitarProPath)
-            except guitarpro.GPException as exc:
-                print("###This is not a supported Guitar Pro file:", guitarProPath, ":", exc)
-            else:
-                if isABassGuitarDrumsFile(tab):
-                    print(guitarProPath)
+    paths = (os.path.join(dirpath, file)
+             for dirpath, dirs, files in os.walk(source)
+             for file in fnmatch.filter(files, supportedExtensions))
+    for guitarProPath, result in guitarpro.parse_many(paths, reducer=isABassGuitarDrumsFile, depth='tracks'):
+        if isinstance(result, Exception):
+            print("###This is not a supported Guitar Pro file:", guitarProPath, ":", result)
+        elif result:
+            print(guitarProPath)
     print("\nDone!")
 
 
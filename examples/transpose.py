@@ -3,6 +3,7 @@ from __future__ import print_function
 from os import path
 
 import guitarpro
+from guitarpro import transform
 
 
 def unfold_tracknumber(tracknumber, tracks):
@@ -16,27 +17,6 @@ def unfold_tracknumber(tracknumber, tracks):
         yield tracknumber
 
 
-def process(track, measure, voice, beat, note, semitone, stringmap):
-    if (1 << (note.string - 1) & stringmap and
-            not (note.type == guitarpro.NoteType.dead or
-                 note.type == guitarpro.NoteType.tie)):
-        note.value += semitone
-        capped = max(0, min(track.fretCount, note.value))
-        if note.value != capped:
-            print("Warning on track %d '%s', measure %d" % (track.number, track.name, measure.number))
-            note.type = guitarpro.NoteType.dead
-            note.value = capped
-    return note
-
-
-def transpose(track, semitone, stringmap):
-    for measure in track.measures:
-        for voice in measure.voices:
-            for beat in voice.beats:
-                for note in beat.notes:
-                    note = process(track, measure, voice, beat, note, semitone, stringmap)
-
-
 def main(source, dest, tracks, semitones, stringmaps):
     if tracks is None:
         tracks = ['*']
@@ -46,7 +26,10 @@ def main(source, dest, tracks, semitones, stringmaps):
     for number, semitone, stringmap in zip(tracks, semitones, stringmaps):
         for number in unfold_tracknumber(number, song.tracks):
             track = song.tracks[number - 1]
-            transpose(track, semitone, stringmap)
+            strings = [string.number for string in track.strings if 1 << (string.number - 1) & stringmap]
+            for index in transform.transpose(song, semitone, tracks=[number], strings=strings):
+                print("Warning on track %d '%s', measure %d" %
+                      (track.number, track.name, index[1] + 1))
     if dest is None:
         dest = '%s-transposed%s' % path.splitext(source)
     guitarpro.write(song, dest)
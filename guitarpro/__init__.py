@@ -1,4 +1,6 @@
-from .io import parse, write  # noqa
+from .io import parse, parse_measures, iterparse, parse_many, write  # noqa
+from .delta import diff, patch  # noqa
+from . import cache, index, snapshot  # noqa
 from .models import *  # noqa
 
 __version__ = '0.3.1'
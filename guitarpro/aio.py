@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import multiprocessing
+import weakref
+
+from six import string_types
+
+from . import io
+
+__all__ = ('configure', 'parse', 'write')
+
+_config = {
+    'executor': None,
+    'limit': multiprocessing.cpu_count(),
+}
+
+# Semaphores are bound to event loops
+_semaphores = weakref.WeakKeyDictionary()
+
+
+def configure(executor=None, limit=None):
+    """Set executor and concurrency limit of :func:`parse` and
+    :func:`write`.
+
+    Files are decoded and encoded in an executor, so they don't block
+    the event loop. Threads of the default executor share the
+    interpreter lock, and a :class:`concurrent.futures.ProcessPoolExecutor`
+    processes several files in parallel, at the cost of pickling songs
+    between processes.
+
+    Calls over the limit wait for a free slot before they read their
+    input, so a burst of uploads doesn't pile up in memory.
+
+    :param executor: a :class:`concurrent.futures.Executor`. If it's
+        ``None``, the default executor of the event loop is used.
+    :param limit: maximum number of files read or written at once. By
+        default it's the number of processors.
+
+    """
+    _config['executor'] = executor
+    _config['limit'] = limit if limit is not None else multiprocessing.cpu_count()
+    _semaphores.clear()
+
+
+async def parse(stream, **kwargs):
+    """Read a GP file in an executor.
+
+    :param stream: an :class:`asyncio.StreamReader`, which is read till
+        the end, path to a GP file, or contents of a GP file as
+        :class:`bytes`, :class:`bytearray`, or :class:`memoryview`.
+
+    Keyword arguments are passed to :func:`guitarpro.parse`, except for
+    *lazy*: lazily read songs would read the file outside the executor.
+
+    """
+    if kwargs.get('lazy'):
+        raise ValueError('songs cannot be parsed lazily in an executor')
+    async with _slot():
+        if isinstance(stream, asyncio.StreamReader):
+            stream = await stream.read()
+        elif isinstance(stream, memoryview):
+            # Memory views can't be pickled for executors in other
+            # processes
+            stream = stream.tobytes()
+        return await _run(functools.partial(io.parse, stream, **kwargs))
+
+
+async def write(song, stream=None, version=None, encoding='cp1252'):
+    """Write a song in an executor.
+
+    :param song: a song to write.
+    :param stream: an :class:`asyncio.StreamWriter`, which is drained
+        after writing, or path to save GP file. If it's ``None``,
+        contents of the file are returned as :class:`bytes`.
+    :param version: explicitly set version of GP file to save, e.g.
+        ``(5, 1, 0)``. By default it's the version of the song, or it's
+        guessed by extension of the path, and GP5 is written if neither
+        is known, as in :func:`guitarpro.write`.
+    :param encoding: encode strings into given 8-bit charset.
+
+    """
+    async with _slot():
+        if isinstance(stream, string_types):
+            return await _run(functools.partial(io.write, song, stream, version=version, encoding=encoding))
+        data = await _run(functools.partial(io.write, song, version=version, encoding=encoding))
+        if stream is None:
+            return data
+        stream.write(data)
+        await stream.drain()
+
+
+def _slot():
+    loop = asyncio.get_event_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(_config['limit'])
+    return semaphore
+
+
+def _run(function):
+    loop = asyncio.get_event_loop()
+    return loop.run_in_executor(_config['executor'], function)
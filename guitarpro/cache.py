@@ -0,0 +1,258 @@
+from __future__ import division
+
+import hashlib
+import os
+import tempfile
+import zlib
+from collections import OrderedDict
+
+from six import string_types
+
+from . import io, snapshot
+from .iobase import BUFFER_TYPES, GPFileBase
+
+__all__ = ('Cache', 'MemoryCache', 'DirectoryCache')
+
+# Python 2 has no os.replace, os.rename replaces files on POSIX there
+_replace = getattr(os, 'replace', os.rename)
+
+
+class Cache(object):
+
+    """Base class of caches of parsed songs.
+
+    Songs are stored under a hash of contents of the file and of the
+    options they were parsed with, so a changed file is parsed again.
+    They're stored as compressed snapshots made by
+    :func:`guitarpro.snapshot.dumps`.
+
+    Subclasses store serialized songs with :meth:`get`, :meth:`set` and
+    :meth:`clear`.
+
+    .. attribute:: hits
+
+        Number of songs loaded from the cache.
+
+    .. attribute:: misses
+
+        Number of songs that were parsed and stored.
+
+    .. attribute:: evictions
+
+        Number of songs removed to stay within the size limit.
+
+    """
+
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def parse(self, stream, encoding='cp1252', depth='full', tracks=None, intern=False):
+        """Get the song from the cache, or parse it and store it.
+
+        Arguments are those of :func:`guitarpro.parse`.
+
+        """
+        data = _readAll(stream)
+        key = self.key(data, encoding=encoding, depth=depth, tracks=tracks)
+        serialized = self.get(key)
+        if serialized is not None:
+            song = self.loadSong(serialized, encoding, intern)
+            if song is not None:
+                self.hits += 1
+                return song
+        self.misses += 1
+        song = io.parse(data, encoding=encoding, depth=depth, tracks=tracks, intern=intern)
+        self.set(key, self.dumpSong(song))
+        return song
+
+    def key(self, data, **options):
+        """Get cache key of file contents parsed with *options*."""
+        digest = hashlib.sha1(data)
+        digest.update(repr((snapshot.VERSION, snapshot._FORMAT, sorted(options.items()))).encode('ascii'))
+        return digest.hexdigest()
+
+    def dumpSong(self, song):
+        return zlib.compress(snapshot.dumps(song), 1)
+
+    def loadSong(self, serialized, encoding, intern):
+        """Restore the song, or return ``None`` if the data is broken."""
+        try:
+            song = snapshot.loads(zlib.decompress(serialized))
+        except (ValueError, EOFError, TypeError, KeyError, zlib.error):
+            return None
+        if intern:
+            _share(song, GPFileBase(b'', encoding).share)
+        return song
+
+    def get(self, key):
+        """Get serialized song by its key, or ``None`` if it's missing."""
+        raise NotImplementedError
+
+    def set(self, key, serialized):
+        """Store serialized song and evict old ones over the size
+        limit."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all songs."""
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+
+    """Cache that keeps serialized songs in memory.
+
+    Least recently used songs are evicted when the size of stored songs
+    exceeds *maxBytes*.
+
+    """
+
+    def __init__(self, maxBytes=64 * 1024 * 1024):
+        super(MemoryCache, self).__init__(maxBytes)
+        self._items = OrderedDict()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        serialized = self._items.pop(key, None)
+        if serialized is not None:
+            self._items[key] = serialized
+        return serialized
+
+    def set(self, key, serialized):
+        if len(serialized) > self.maxBytes:
+            return
+        previous = self._items.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self._items[key] = serialized
+        self.size += len(serialized)
+        while self.size > self.maxBytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+        self.size = 0
+
+
+class DirectoryCache(Cache):
+
+    """Cache that keeps serialized songs in files of a directory.
+
+    Files are named after their keys. Least recently used files are
+    removed when their total size exceeds *maxBytes*. Access times are
+    tracked with modification times of files, so the cache can be
+    shared by several processes, including those of other versions of
+    Python, which keep their own files.
+
+    Files are snapshots, see :func:`guitarpro.snapshot.loads`, so only
+    trusted users should be able to write to the directory.
+
+    """
+
+    suffix = '.song'
+
+    def __init__(self, path, maxBytes=1024 * 1024 * 1024):
+        super(DirectoryCache, self).__init__(maxBytes)
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.size = sum(os.path.getsize(filepath) for filepath in self._files())
+
+    def _files(self):
+        return [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(self.suffix)]
+
+    def _filepath(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def get(self, key):
+        filepath = self._filepath(key)
+        try:
+            with open(filepath, 'rb') as fp:
+                serialized = fp.read()
+            os.utime(filepath, None)
+        except (IOError, OSError):
+            return None
+        return serialized
+
+    def set(self, key, serialized):
+        if len(serialized) > self.maxBytes:
+            return
+        filepath = self._filepath(key)
+        # Other processes never see partially written files
+        fd, temppath = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(serialized)
+            try:
+                oldSize = os.path.getsize(filepath)
+            except OSError:
+                oldSize = 0
+            # The file is replaced at once, readers get either the old
+            # or the new one
+            _replace(temppath, filepath)
+        except BaseException:
+            os.remove(temppath)
+            raise
+        self.size += len(serialized) - oldSize
+        if self.size > self.maxBytes:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for filepath in self._files():
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, filepath))
+        entries.sort()
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, filepath in entries:
+            if self.size <= self.maxBytes:
+                break
+            try:
+                os.remove(filepath)
+            except OSError:
+                continue
+            self.size -= size
+            self.evictions += 1
+
+    def clear(self):
+        for filepath in self._files():
+            os.remove(filepath)
+        self.size = 0
+
+
+def _readAll(stream):
+    if isinstance(stream, string_types):
+        with open(stream, 'rb') as fp:
+            return fp.read()
+    if isinstance(stream, BUFFER_TYPES):
+        return bytes(stream)
+    # Streams are closed as guitarpro.parse does
+    try:
+        return stream.read()
+    finally:
+        stream.close()
+
+
+def _share(song, share):
+    """Share values of beats and notes as readers do with
+    ``intern=True``."""
+    for track in song.tracks:
+        for measure in track.measures:
+            for voice in measure.voices:
+                for beat in voice.beats:
+                    beat.duration = share(beat.duration)
+                    beat.effect = share(beat.effect)
+                    beat.display = share(beat.display)
+                    for note in beat.notes:
+                        note.effect = share(note.effect)
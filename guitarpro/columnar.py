@@ -0,0 +1,369 @@
+from __future__ import division
+
+from array import array
+
+from six import string_types
+
+from . import models as gp
+from .io import _open
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ('export', 'load', 'NoteTable', 'DTYPE')
+
+#: Fields of exported arrays, one row per note.
+DTYPE = [
+    ('track', 'u1'),
+    ('measure', 'u4'),
+    ('voice', 'u1'),
+    ('start', 'i8'),
+    ('duration', 'i4'),
+    ('string', 'i1'),
+    ('fret', 'i1'),
+    ('pitch', 'i2'),
+    ('velocity', 'i2'),
+    ('type', 'i1'),
+    ('effects', 'u4'),
+]
+
+_TYPECODES = {
+    'track': 'B',
+    'measure': 'L',
+    'voice': 'B',
+    'start': 'l',
+    'duration': 'l',
+    'string': 'b',
+    'fret': 'b',
+    'pitch': 'h',
+    'velocity': 'h',
+    'type': 'b',
+    'effects': 'L',
+}
+
+# Bits of the ``effects`` field
+ACCENTUATED_NOTE = 0x0001
+BEND = 0x0002
+GHOST_NOTE = 0x0004
+GRACE = 0x0008
+HAMMER = 0x0010
+HARMONIC = 0x0020
+HEAVY_ACCENTUATED_NOTE = 0x0040
+LET_RING = 0x0080
+PALM_MUTE = 0x0100
+SLIDE = 0x0200
+STACCATO = 0x0400
+TREMOLO_PICKING = 0x0800
+TRILL = 0x1000
+VIBRATO = 0x2000
+
+
+def export(song, encoding='cp1252', backend='stream', tracks=None):
+    """Export notes of a song into a NumPy structured array.
+
+    The array has a row per note with fields listed in :data:`DTYPE`:
+    number of the track and of the measure, index of the voice, start
+    of the beat and its duration in ticks, string, fret, MIDI pitch and
+    velocity of the note, value of :class:`~guitarpro.models.NoteType`,
+    and note effects as bits, e.g. :data:`PALM_MUTE`. Rows are ordered
+    as measures are stored in files: by measure, then by track.
+
+    Requires NumPy.
+
+    :param song: a song, or a path to a GP file, file-like object, or
+        contents of a GP file. Files are read measure by measure, and
+        measures are discarded after export, as with
+        :func:`guitarpro.iterparse`.
+    :param encoding: decode strings in tablature using this charset.
+    :param backend: how to read a file-like object. See
+        :func:`guitarpro.parse`.
+    :param tracks: numbers of tracks to export, starting from 1. By
+        default all tracks are exported.
+
+    """
+    if numpy is None:
+        raise ImportError('NumPy is required to export songs into arrays')
+    columns = _Columns()
+    if isinstance(song, gp.Song):
+        selected = [track for track in song.tracks if tracks is None or track.number in tracks]
+        for measures in zip(*[track.measures for track in selected]):
+            for measure in measures:
+                columns.addMeasure(measure)
+    else:
+        gpfile = _open(None, song, 'rb', encoding=encoding, backend=backend, depth='tracks', tracks=tracks)
+        with gpfile:
+            song = gpfile.readSong()
+            for measure in gpfile.iterMeasures(song):
+                columns.addMeasure(measure)
+                del measure.track.measures[:]
+    return columns.toArray()
+
+
+class _Columns(object):
+
+    def __init__(self):
+        self.columns = {name: array(typecode) for name, typecode in _TYPECODES.items()}
+
+    def addMeasure(self, measure):
+        track = measure.track
+        strings = [string.value for string in track.strings]
+        columns = self.columns
+        for voiceIndex, voice in enumerate(measure.voices):
+            for beat in voice.beats:
+                if not beat.notes:
+                    continue
+                start = beat.start if beat.start is not None else -1
+                duration = beat.duration.time
+                for note in beat.notes:
+                    columns['track'].append(track.number)
+                    columns['measure'].append(measure.number)
+                    columns['voice'].append(voiceIndex)
+                    columns['start'].append(start)
+                    columns['duration'].append(duration)
+                    columns['string'].append(note.string)
+                    columns['fret'].append(note.value)
+                    columns['pitch'].append(note.value + strings[note.string - 1])
+                    columns['velocity'].append(note.velocity)
+                    columns['type'].append(note.type.value)
+                    columns['effects'].append(_effectBits(note.effect))
+
+    def toArray(self):
+        result = numpy.empty(len(self.columns['track']), dtype=DTYPE)
+        for name, column in self.columns.items():
+            result[name] = numpy.asarray(column)
+        return result
+
+
+def _effectBits(effect):
+    bits = 0
+    if effect.accentuatedNote:
+        bits |= ACCENTUATED_NOTE
+    if effect.bend is not None:
+        bits |= BEND
+    if effect.ghostNote:
+        bits |= GHOST_NOTE
+    if effect.grace is not None:
+        bits |= GRACE
+    if effect.hammer:
+        bits |= HAMMER
+    if effect.harmonic is not None:
+        bits |= HARMONIC
+    if effect.heavyAccentuatedNote:
+        bits |= HEAVY_ACCENTUATED_NOTE
+    if effect.letRing:
+        bits |= LET_RING
+    if effect.palmMute:
+        bits |= PALM_MUTE
+    if effect.slides:
+        bits |= SLIDE
+    if effect.staccato:
+        bits |= STACCATO
+    if effect.tremoloPicking is not None:
+        bits |= TREMOLO_PICKING
+    if effect.trill is not None:
+        bits |= TRILL
+    if effect.vibrato:
+        bits |= VIBRATO
+    return bits
+
+
+def load(stream, encoding='cp1252', tracks=None):
+    """Read notes of a GP file into a :class:`NoteTable`.
+
+    Notes are located by skipping measures, no models are created for
+    measures, beats or notes.
+
+    :param stream: path to a GP file, file-like object, or contents of a
+        GP file.
+    :param encoding: decode strings in tablature using this charset.
+    :param tracks: numbers of tracks to load, starting from 1. Notes of
+        other tracks are skipped and are written back unchanged. By
+        default notes of all tracks are loaded.
+
+    """
+    gpfile = _open(None, stream, 'rb', encoding=encoding, backend='buffer', depth='tracks')
+    with gpfile:
+        song = gpfile.readSong()
+        table = NoteTable(song, bytearray(gpfile.data), gpfile.unpackVelocity, gpfile.packVelocity)
+        if tracks is None:
+            sink = table._addNote
+        else:
+            def sink(track, *note):
+                if track.number in tracks:
+                    table._addNote(track, *note)
+        gpfile.scanNotes(song, sink)
+    return table
+
+
+class NoteTable(object):
+
+    """Notes of a GP file stored in parallel arrays.
+
+    Each note is a row of :class:`array.array` columns: :attr:`track`
+    and :attr:`measure` numbers, :attr:`string`, :attr:`fret`,
+    :attr:`velocity` and :attr:`type`, a value of
+    :class:`~guitarpro.models.NoteType`. Columns can be modified in
+    place, e.g. with :meth:`transpose` or :meth:`scaleVelocity`, or
+    through NumPy views made by :func:`numpy.frombuffer`, and
+    :meth:`write` saves changed notes into a copy of the file. The rest
+    of the file is copied as is.
+
+    Frets of tied notes are stored in the file, but readers replace
+    them with the fret of the note they continue.
+
+    The table isn't a representation of the song: it has no beats,
+    voices or ties, and notes can't be added or removed. Only edits
+    that keep the layout of the file are supported, that is changes of
+    frets, note types and velocities. Other edits need models, see
+    :func:`guitarpro.parse`.
+
+    :attr:`song` holds score information, measure headers and tracks
+    without measures.
+
+    """
+
+    def __init__(self, song, data, unpackVelocity, packVelocity):
+        self.song = song
+        self.track = array('B')
+        self.measure = array('L')
+        self.string = array('b')
+        self.fret = array('b')
+        self.velocity = array('h')
+        self.type = array('b')
+        self._data = data
+        self._unpackVelocity = unpackVelocity
+        self._packVelocity = packVelocity
+        self._flags = array('B')
+        self._flagsPositions = array('L')
+        self._typePositions = array('l')
+        self._dynamicsPositions = array('L')
+        self._fretPositions = array('l')
+
+    def __len__(self):
+        return len(self.track)
+
+    def _addNote(self, track, header, string, position, flags, typePosition, dynamicsPosition, fretPosition):
+        data = self._data
+        self.track.append(track.number)
+        self.measure.append(header.number)
+        self.string.append(string)
+        if flags & 0x20:
+            self.type.append(data[typePosition])
+            self.fret.append(_signed(data[fretPosition]))
+        else:
+            self.type.append(gp.NoteType.rest.value)
+            self.fret.append(0)
+        if flags & 0x10:
+            self.velocity.append(self._unpackVelocity(_signed(data[dynamicsPosition])))
+        else:
+            self.velocity.append(gp.Velocities.default)
+        self._flags.append(flags)
+        self._flagsPositions.append(position)
+        self._typePositions.append(typePosition)
+        self._dynamicsPositions.append(dynamicsPosition)
+        self._fretPositions.append(fretPosition)
+
+    def pitches(self):
+        """Get MIDI pitches of notes as an array."""
+        tunings = {track.number: {string.number: string.value for string in track.strings}
+                   for track in self.song.tracks}
+        return array('h', [fret + tunings[track][string]
+                           for track, string, fret in zip(self.track, self.string, self.fret)])
+
+    def transpose(self, semitones, tracks=None, strings=None):
+        """Transpose notes by a number of semitones.
+
+        Dead and tied notes are not changed. Notes that don't fit on the
+        fretboard are capped and become dead, as in
+        ``examples/transpose.py``.
+
+        :param tracks: numbers of tracks to transpose, by default all
+            tracks except percussion ones.
+        :param strings: numbers of strings to transpose, by default all
+            strings.
+        :returns: array of indices of notes that didn't fit on the
+            fretboard.
+
+        """
+        fretCounts = {track.number: track.fretCount for track in self.song.tracks
+                      if tracks is None and not track.isPercussionTrack or
+                      tracks is not None and track.number in tracks}
+        skipped = (gp.NoteType.dead.value, gp.NoteType.tie.value)
+        fret = self.fret
+        type_ = self.type
+        outOfRange = array('L')
+        for index, (track, string) in enumerate(zip(self.track, self.string)):
+            fretCount = fretCounts.get(track)
+            if (fretCount is None or self._fretPositions[index] < 0 or type_[index] in skipped or
+                    strings is not None and string not in strings):
+                continue
+            value = fret[index] + semitones
+            capped = max(0, min(fretCount, value))
+            if value != capped:
+                type_[index] = gp.NoteType.dead.value
+                outOfRange.append(index)
+            fret[index] = capped
+        return outOfRange
+
+    def scaleVelocity(self, factor):
+        """Multiply velocities of notes by *factor*.
+
+        Velocities are capped between
+        :attr:`~guitarpro.models.Velocities.minVelocity` and 127. Files
+        store them as dynamics, so written velocities are rounded down
+        to steps of :attr:`~guitarpro.models.Velocities.velocityIncrement`.
+
+        """
+        minVelocity = gp.Velocities.minVelocity
+        velocity = self.velocity
+        for index, value in enumerate(velocity):
+            velocity[index] = max(minVelocity, min(127, int(round(value * factor))))
+
+    def write(self, stream=None):
+        """Write the file with changed notes.
+
+        Dynamics are added to notes that didn't have them if their
+        velocity has changed from the default one.
+
+        :param stream: path to save GP file or file-like object. If it's
+            ``None``, contents of the file are returned as
+            :class:`bytes`.
+
+        """
+        data = bytearray(self._data)
+        insertions = []
+        for index in range(len(self)):
+            flags = self._flags[index]
+            if self._fretPositions[index] >= 0:
+                data[self._fretPositions[index]] = self.fret[index] & 0xff
+                data[self._typePositions[index]] = self.type[index] & 0xff
+            elif self.fret[index] != 0 or self.type[index] != gp.NoteType.rest.value:
+                raise ValueError('note %d has no fret in the file' % index)
+            velocity = self.velocity[index]
+            if flags & 0x10:
+                data[self._dynamicsPositions[index]] = self._packVelocity(velocity) & 0xff
+            elif velocity != gp.Velocities.default:
+                data[self._flagsPositions[index]] = flags | 0x10
+                insertions.append((self._dynamicsPositions[index], self._packVelocity(velocity) & 0xff))
+        if insertions:
+            chunks = []
+            start = 0
+            for position, value in insertions:
+                chunks.append(data[start:position])
+                chunks.append(bytearray((value,)))
+                start = position
+            chunks.append(data[start:])
+            data = bytearray().join(chunks)
+        if stream is None:
+            return bytes(data)
+        if isinstance(stream, string_types):
+            with open(stream, 'wb') as fp:
+                fp.write(data)
+        else:
+            stream.write(data)
+
+
+def _signed(byte):
+    return byte - 256 if byte > 127 else byte
@@ -0,0 +1,327 @@
+from __future__ import division
+
+import copy
+import difflib
+
+try:
+    from collections.abc import MutableSequence
+except ImportError:
+    from collections import MutableSequence
+
+import attr
+
+from . import models as gp
+
+__all__ = ('diff', 'patch')
+
+#: Attributes that refer to the model containing the model.
+_PARENTS = {
+    gp.Track: 'song',
+    gp.Measure: 'track',
+    gp.Voice: 'measure',
+    gp.Beat: 'voice',
+    gp.Note: 'beat',
+}
+
+#: Attributes that hold lists of contained models.
+_CHILDREN = {
+    gp.Song: 'tracks',
+    gp.Track: 'measures',
+    gp.Measure: 'voices',
+    gp.Voice: 'beats',
+    gp.Beat: 'notes',
+}
+
+#: Attributes that follow from positions of models and are restored by
+#: :func:`patch`.
+_DERIVED = {
+    gp.Measure: ('header',),
+    gp.MeasureHeader: ('number', 'start'),
+    gp.Beat: ('start',),
+}
+
+_NAMES = {}
+
+
+def diff(a, b):
+    """Compute operations that turn song *a* into song *b*.
+
+    Operations are tuples whose second item is a path to an attribute or
+    a list in the song, as a tuple of attribute names and list indices,
+    e.g. ``('tracks', 0, 'measures', 41, 'voices', 0, 'beats')``:
+
+    - ``('set', path, value)`` sets the attribute or list item;
+    - ``('insert', path, index, values)`` inserts a list of values into
+      the list at *index*;
+    - ``('delete', path, index, count)`` deletes *count* items from the
+      list starting at *index*.
+
+    Operations are listed in order they're applied. Measure headers are
+    aligned first, and measures of tracks follow their alignment. Other
+    lists of models are aligned by hashes of their items. Equal models
+    are skipped, so the number of operations depends on the size of the
+    edit rather than on the size of the song.
+
+    Values in operations don't refer to *b*, so operations can be
+    pickled and stored on their own.
+
+    :rtype: list
+
+    """
+    differ = _Differ()
+    differ.diffModels(a, b, ())
+    return differ.ops
+
+
+def patch(song, ops):
+    """Apply operations computed by :func:`diff` to the song.
+
+    The song is modified in place and returned. Values in operations are
+    copied, so the same operations can be applied to several songs.
+    Shared values, see :func:`guitarpro.models.share`, are replaced
+    with writable copies before they're modified.
+
+    """
+    headersChanged = False
+    for op in ops:
+        kind, path = op[0], op[1]
+        if headersChanged and path[0] != 'measureHeaders':
+            _renumberHeaders(song)
+            headersChanged = False
+        if kind == 'set':
+            parent = _resolve(song, path[:-1])
+            key = path[-1]
+            value = _attach(copy.deepcopy(op[2]), parent, song, key)
+            if isinstance(key, int):
+                parent[key] = value
+            else:
+                setattr(parent, key, value)
+        elif kind == 'insert':
+            index, values = op[2], op[3]
+            parent = _resolve(song, path[:-1])
+            items = _resolve(song, path)
+            for offset, value in enumerate(copy.deepcopy(values)):
+                items.insert(index + offset, value)
+                _attach(value, parent, song, index + offset)
+        elif kind == 'delete':
+            index, count = op[2], op[3]
+            items = _resolve(song, path)
+            del items[index:index + count]
+        else:
+            raise ValueError("unknown operation '%s'" % kind)
+        if path == ('measureHeaders',):
+            headersChanged = True
+    if headersChanged:
+        _renumberHeaders(song)
+    return song
+
+
+class _Differ(object):
+
+    def __init__(self):
+        self.ops = []
+        # Models of the new song that contain the model being compared
+        self.parents = []
+        self.headerOpcodes = None
+
+    def diffModels(self, a, b, path):
+        cls = _modelClass(b)
+        self.parents.append(b)
+        try:
+            if cls is gp.Beat and _relativeStart(a) != _relativeStart(b):
+                self.ops.append(('set', path + ('start',), b.start))
+            for name in _diffedNames(cls):
+                valueA = getattr(a, name)
+                valueB = getattr(b, name)
+                if name == 'measureHeaders' and cls is gp.Song:
+                    self.headerOpcodes = _align(valueA, valueB)
+                    self.diffLists(valueA, valueB, path + (name,), self.headerOpcodes)
+                elif name == 'measures' and cls is gp.Track:
+                    self.diffLists(valueA, valueB, path + (name,), self.headerOpcodes)
+                else:
+                    self.diffValues(valueA, valueB, path + (name,))
+        finally:
+            self.parents.pop()
+
+    def diffValues(self, a, b, path):
+        if a is b:
+            return
+        cls = _modelClass(a)
+        if attr.has(cls) and cls is _modelClass(b):
+            # Tempo of measure headers isn't compared
+            if a != b or cls is gp.MeasureHeader:
+                self.diffModels(a, b, path)
+        elif _isList(a) and _isList(b) and (a or b) and attr.has(_modelClass((a or b)[0])):
+            self.diffLists(a, b, path)
+        elif a != b or type(a) is not type(b):
+            self.ops.append(('set', path, self.detach(b)))
+
+    def diffLists(self, a, b, path, opcodes=None):
+        # Models in lists aligned by measure headers are compared even if
+        # their headers are the same
+        skipSame = opcodes is None
+        if opcodes is None:
+            opcodes = _align(a, b)
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'same' and skipSame:
+                continue
+            paired = min(i2 - i1, j2 - j1)
+            for offset in range(paired):
+                self.diffValues(a[i1 + offset], b[j1 + offset], path + (j1 + offset,))
+            if i2 - i1 > paired:
+                self.ops.append(('delete', path, j1 + paired, i2 - i1 - paired))
+            if j2 - j1 > paired:
+                values = [b[j] for j in range(j1 + paired, j2)]
+                self.ops.append(('insert', path, j1 + paired, self.detach(values)))
+
+    def detach(self, value):
+        """Copy value without references to models of the new song
+        outside the value."""
+        if not attr.has(type(value)) and not isinstance(value, list):
+            return value
+        memo = {id(parent): None for parent in self.parents}
+        for item in (value if isinstance(value, list) else [value]):
+            if isinstance(item, gp.Track):
+                for measure in item.measures:
+                    memo[id(measure.header)] = None
+            elif isinstance(item, gp.Measure):
+                memo[id(item.header)] = None
+            elif isinstance(item, gp.MeasureHeader):
+                memo[id(getattr(item, 'repeatGroup', None))] = None
+        memo.pop(id(None), None)
+        detached = copy.deepcopy(value, memo)
+        # Song and repeat group are set on headers when reading
+        for item in (detached if isinstance(detached, list) else [detached]):
+            if isinstance(item, gp.MeasureHeader):
+                vars(item).pop('song', None)
+                vars(item).pop('repeatGroup', None)
+        return detached
+
+
+def _modelClass(value):
+    cls = type(value)
+    if cls in gp._SHARED_TYPES:
+        return cls.__bases__[0]
+    return cls
+
+
+def _diffedNames(cls):
+    try:
+        return _NAMES[cls]
+    except KeyError:
+        skipped = set(_DERIVED.get(cls, ()))
+        skipped.add(_PARENTS.get(cls))
+        names = _NAMES[cls] = [attribute.name for attribute in attr.fields(cls)
+                               if not attribute.name.startswith('_') and attribute.name not in skipped]
+        return names
+
+
+def _isList(value):
+    return isinstance(value, (list, MutableSequence))
+
+
+def _align(a, b):
+    """Align lists of models.
+
+    Equal items at the start and at the end of the lists are tagged as
+    ``'same'``. Items in between are paired one to one if there are as
+    many of them in both lists, otherwise they're aligned by their
+    hashes.
+
+    """
+    start = 0
+    stop = min(len(a), len(b))
+    while start < stop and a[start] == b[start]:
+        start += 1
+    endA = len(a)
+    endB = len(b)
+    while endA > start and endB > start and a[endA - 1] == b[endB - 1]:
+        endA -= 1
+        endB -= 1
+    opcodes = []
+    if start:
+        opcodes.append(('same', 0, start, 0, start))
+    if endA - start == endB - start:
+        if endA > start:
+            opcodes.append(('replace', start, endA, start, endB))
+    else:
+        matcher = difflib.SequenceMatcher(None, [hash(item) for item in a[start:endA]],
+                                          [hash(item) for item in b[start:endB]], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            opcodes.append((tag, start + i1, start + i2, start + j1, start + j2))
+    if endA < len(a):
+        opcodes.append(('same', endA, len(a), endB, len(b)))
+    return opcodes
+
+
+def _relativeStart(beat):
+    """Get start of the beat relative to the start of its measure."""
+    if beat.start is None or beat.voice is None:
+        return beat.start
+    return beat.start - beat.voice.measure.start
+
+
+def _renumberHeaders(song):
+    """Number measure headers and compute their start, shifting beats
+    of measures that have moved."""
+    shifts = {}
+    start = gp.Duration.quarterTime
+    for number, header in enumerate(song.measureHeaders, 1):
+        if header.start != start:
+            shifts[id(header)] = start - header.start
+        header.number = number
+        header.start = start
+        start += header.length
+    if not shifts:
+        return
+    for track in song.tracks:
+        for measure in track.measures:
+            shift = shifts.get(id(measure.header))
+            if not shift:
+                continue
+            for voice in measure.voices:
+                for beat in voice.beats:
+                    if beat.start is not None:
+                        beat.start += shift
+
+
+def _resolve(song, path):
+    """Get a model or a list at *path*, replacing shared values on the
+    way with writable copies."""
+    obj = song
+    for key in path:
+        if isinstance(key, int):
+            child = obj[key]
+        else:
+            child = getattr(obj, key)
+        unshared = gp.unshare(child)
+        if unshared is not child:
+            if isinstance(key, int):
+                obj[key] = unshared
+            else:
+                setattr(obj, key, unshared)
+        obj = unshared
+    return obj
+
+
+def _attach(value, parent, song, index):
+    """Restore references of a copied model to its parents."""
+    if isinstance(value, list):
+        for number, item in enumerate(value):
+            _attach(item, parent, song, number)
+        return value
+    cls = type(value)
+    if cls is gp.Track:
+        value.song = song
+    elif cls is gp.Measure:
+        value.track = parent
+        value.header = song.measureHeaders[index]
+    elif cls is gp.MeasureHeader:
+        value.song = song
+    elif cls in _PARENTS:
+        setattr(value, _PARENTS[cls], parent)
+    children = _CHILDREN.get(cls)
+    if children is not None:
+        for number, child in enumerate(getattr(value, children)):
+            _attach(child, value, song, number)
+    return value
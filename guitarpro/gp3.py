@@ -1,11 +1,19 @@
 from __future__ import division
 
+from array import array
+from functools import partial
+
 import attr
 
 from . import models as gp
 from .iobase import GPFileBase
+from .lazy import MeasureList
 from .utils import clamp, bit_length
 
+# Values of beat status and note type as they're stored in files
+_EMPTY_BEAT, _NORMAL_BEAT = gp.BeatStatus.empty.value, gp.BeatStatus.normal.value
+_REST_NOTE, _TIED_NOTE = gp.NoteType.rest.value, gp.NoteType.tie.value
+
 
 class GP3File(GPFileBase):
 
@@ -54,11 +62,15 @@ class GP3File(GPFileBase):
         self._tripletFeel = gp.TripletFeel.eighth if self.readBool() else gp.TripletFeel.none
         song.tempo = self.readInt()
         song.key = gp.KeySignature((self.readInt(), 0))
+        if self.depth == 'info':
+            return song
         channels = self.readMidiChannels()
         measureCount = self.readInt()
         trackCount = self.readInt()
         self.readMeasureHeaders(song, measureCount)
         self.readTracks(song, trackCount, channels)
+        if self.depth == 'tracks':
+            return song
         self.readMeasures(song)
         return song
 
@@ -133,22 +145,23 @@ class GP3File(GPFileBase):
         """
         channels = []
         for i in range(64):
+            # Last 2 blank bytes are kept for backward compatibility with
+            # version 3.0
+            (instrument, volume, balance, chorus, reverb, phaser,
+             tremolo) = self.readStruct('<i6b2x')
             newChannel = gp.MidiChannel()
             newChannel.channel = i
             newChannel.effectChannel = i
-            instrument = self.readInt()
             if newChannel.isPercussionChannel and instrument == -1:
                 instrument = 0
             newChannel.instrument = instrument
-            newChannel.volume = self.toChannelShort(self.readSignedByte())
-            newChannel.balance = self.toChannelShort(self.readSignedByte())
-            newChannel.chorus = self.toChannelShort(self.readSignedByte())
-            newChannel.reverb = self.toChannelShort(self.readSignedByte())
-            newChannel.phaser = self.toChannelShort(self.readSignedByte())
-            newChannel.tremolo = self.toChannelShort(self.readSignedByte())
+            newChannel.volume = self.toChannelShort(volume)
+            newChannel.balance = self.toChannelShort(balance)
+            newChannel.chorus = self.toChannelShort(chorus)
+            newChannel.reverb = self.toChannelShort(reverb)
+            newChannel.phaser = self.toChannelShort(phaser)
+            newChannel.tremolo = self.toChannelShort(tremolo)
             channels.append(newChannel)
-            # Backward compatibility with version 3.0
-            self.skip(2)
         return channels
 
     def toChannelShort(self, data):
@@ -272,10 +285,7 @@ class GP3File(GPFileBase):
         bytes and one blank byte.
 
         """
-        r = self.readByte()
-        g = self.readByte()
-        b = self.readByte()
-        self.skip(1)
+        r, g, b = self.readStruct('<3Bx')
         return gp.Color(r, g, b)
 
     def readTracks(self, song, trackCount, channels):
@@ -339,8 +349,7 @@ class GP3File(GPFileBase):
         track.isBanjoTrack = bool(flags & 0x04)
         track.name = self.readByteSizeString(40)
         stringCount = self.readInt()
-        for i in range(7):
-            iTuning = self.readInt()
+        for i, iTuning in enumerate(self.readInt(7)):
             if stringCount > i:
                 oString = gp.GuitarString(i + 1, iTuning)
                 track.strings.append(oString)
@@ -389,19 +398,92 @@ class GP3File(GPFileBase):
         - ...
         - measure n/track m
 
+        If the file is read lazily, measures are only located, see
+        :meth:`scanMeasures`. Measures of tracks that are not listed in
+        :attr:`tracks` are skipped, see :meth:`skipMeasure`.
+
+        """
+        if self.lazy:
+            offsets = self.scanMeasures(song)
+            self.setMeasureLists(song, offsets)
+            return
+        for _ in self.iterMeasures(song):
+            pass
+
+    def iterMeasures(self, song):
+        """Read measures one by one.
+
+        Each measure is appended to measures of its track and is yielded
+        as soon as it's read.
+
         """
         tempo = gp.Tempo(song.tempo)
         start = gp.Duration.quarterTime
         for header in song.measureHeaders:
             header.start = start
             for track in song.tracks:
+                if self.tracks is not None and track.number not in self.tracks:
+                    self.skipMeasure(track, header)
+                    continue
                 measure = gp.Measure(track, header)
                 tempo = header.tempo
                 track.measures.append(measure)
                 self.readMeasure(measure)
+                yield measure
             header.tempo = tempo
             start += header.length
 
+    def scanMeasures(self, song):
+        """Locate measures without reading them.
+
+        Measures are skipped in the order they're written, see
+        :meth:`readMeasures`. Returns an array of their positions in the
+        same order.
+
+        """
+        offsets = array('L')
+        start = gp.Duration.quarterTime
+        for header in song.measureHeaders:
+            header.start = start
+            for track in song.tracks:
+                offsets.append(self.tell())
+                self.skipMeasure(track, header)
+            start += header.length
+        return offsets
+
+    def scanNotes(self, song, sink):
+        """Locate notes without reading them.
+
+        Measures are skipped as in :meth:`scanMeasures`. For every note
+        *sink* is called with the track, the measure header, number of
+        the string, and values returned by :meth:`scanNote`.
+
+        """
+        start = gp.Duration.quarterTime
+        try:
+            for header in song.measureHeaders:
+                header.start = start
+                for track in song.tracks:
+                    self._noteSink = partial(sink, track, header)
+                    self.skipMeasure(track, header)
+                start += header.length
+        finally:
+            self._noteSink = None
+
+    def setMeasureLists(self, song, offsets):
+        """Replace measures of each track with a
+        :class:`~guitarpro.lazy.MeasureList` that reads measures from
+        *offsets* when they are accessed.
+
+        *offsets* are positions of measures as returned by
+        :meth:`scanMeasures`.
+
+        """
+        trackCount = len(song.tracks)
+        for number, track in enumerate(song.tracks):
+            track.measures = MeasureList(self, track, song.measureHeaders,
+                                         offsets[number::trackCount])
+
     def readMeasure(self, measure):
         """Read measure.
 
@@ -417,6 +499,17 @@ class GP3File(GPFileBase):
         beats = self.readInt()
         for beat in range(beats):
             start += self.readBeat(start, voice)
+        if self.intern:
+            self.shareBeatValues(voice)
+
+    def shareBeatValues(self, voice):
+        """Replace effects of beats and notes in the voice with shared
+        ones, see :meth:`share`."""
+        for beat in voice.beats:
+            beat.effect = self.share(beat.effect)
+            beat.display = self.share(beat.display)
+            for note in beat.notes:
+                note.effect = self.share(note.effect)
 
     def readBeat(self, start, voice):
         """Read beat.
@@ -471,10 +564,21 @@ class GP3File(GPFileBase):
         return duration.time if not beat.status == gp.BeatStatus.empty else 0
 
     def getBeat(self, voice, start):
-        """Get beat from measure by start time."""
-        for beat in reversed(voice.beats):
-            if beat.start == start:
-                return beat
+        """Get beat from measure by start time.
+
+        Beats are read in order of their start time, so the beat is
+        usually either the last one in the voice or a new one.
+
+        """
+        beats = voice.beats
+        if beats:
+            lastBeat = beats[-1]
+            if lastBeat.start == start:
+                return lastBeat
+            if start < lastBeat.start:
+                for beat in reversed(beats):
+                    if beat.start == start:
+                        return beat
         newBeat = gp.Beat(voice)
         newBeat.start = start
         voice.beats.append(newBeat)
@@ -497,37 +601,46 @@ class GP3File(GPFileBase):
 
         If flag at *0x20* is true, the tuplet is read.
 
+        If :attr:`intern` is true, equal durations are shared.
+
         """
-        duration = gp.Duration()
-        duration.value = 1 << (self.readSignedByte() + 2)
-        duration.isDotted = bool(flags & 0x01)
+        value = 1 << (self.readSignedByte() + 2)
+        isDotted = bool(flags & 0x01)
+        enters = times = 1
         if flags & 0x20:
             iTuplet = self.readInt()
             if iTuplet == 3:
-                duration.tuplet.enters = 3
-                duration.tuplet.times = 2
+                enters = 3
+                times = 2
             elif iTuplet == 5:
-                duration.tuplet.enters = 5
-                duration.tuplet.times = 4
+                enters = 5
+                times = 4
             elif iTuplet == 6:
-                duration.tuplet.enters = 6
-                duration.tuplet.times = 4
+                enters = 6
+                times = 4
             elif iTuplet == 7:
-                duration.tuplet.enters = 7
-                duration.tuplet.times = 4
+                enters = 7
+                times = 4
             elif iTuplet == 9:
-                duration.tuplet.enters = 9
-                duration.tuplet.times = 8
+                enters = 9
+                times = 8
             elif iTuplet == 10:
-                duration.tuplet.enters = 10
-                duration.tuplet.times = 8
+                enters = 10
+                times = 8
             elif iTuplet == 11:
-                duration.tuplet.enters = 11
-                duration.tuplet.times = 8
+                enters = 11
+                times = 8
             elif iTuplet == 12:
-                duration.tuplet.enters = 12
-                duration.tuplet.times = 8
-        return duration
+                enters = 12
+                times = 8
+        if self.intern:
+            key = (value, isDotted, enters, times)
+            duration = self._sharedDurations.get(key)
+            if duration is None:
+                duration = self._sharedDurations[key] = gp.share(
+                    gp.Duration(value=value, isDotted=isDotted, tuplet=gp.Tuplet(enters, times)))
+            return duration
+        return gp.Duration(value=value, isDotted=isDotted, tuplet=gp.Tuplet(enters, times))
 
     def readChord(self, stringCount):
         """Read chord diagram.
@@ -938,6 +1051,7 @@ class GP3File(GPFileBase):
             else:
                 value = fret
             note.value = max(0, min(99, value))
+            self.lastFrets.update(track.number, note)
         if flags & 0x80:
             note.effect.leftHandFinger = gp.Fingering(self.readSignedByte())
             note.effect.rightHandFinger = gp.Fingering(self.readSignedByte())
@@ -954,15 +1068,26 @@ class GP3File(GPFileBase):
                 gp.Velocities.velocityIncrement)
 
     def getTiedNoteValue(self, stringIndex, track):
-        """Get note value of tied note."""
-        for measure in reversed(track.measures):
-            for voice in reversed(measure.voices):
-                for beat in voice.beats:
-                    if beat.status != gp.BeatStatus.empty:
-                        for note in beat.notes:
-                            if note.string == stringIndex:
-                                return note.value
-        return -1
+        """Get note value of tied note.
+
+        It's the value of the last sounded note on the same string, see
+        :attr:`lastFrets`. If measures are read lazily, the note is
+        looked for in preceding measures, which are scanned rather than
+        read if they haven't been read yet.
+
+        """
+        value = self.lastFrets.get(track.number, stringIndex)
+        if value is None and self.lazy:
+            value = self.findLastFret(stringIndex, track)
+            if value is not None:
+                self.lastFrets.set(track.number, stringIndex, value)
+        return value if value is not None else -1
+
+    def findLastFret(self, stringIndex, track):
+        """Find the value of the last sounded note on the string in
+        measures preceding the measure being read, see
+        :meth:`guitarpro.lazy.MeasureList.findLastFret`."""
+        return track.measures.findLastFret(stringIndex)
 
     def readNoteEffects(self, note):
         """Read note effects.
@@ -1058,6 +1183,173 @@ class GP3File(GPFileBase):
     def readSlides(self):
         return [gp.SlideType.shiftSlideTo]
 
+    # Skipping
+    # ========
+
+    def skipMeasure(self, track, header):
+        """Skip measure of the *track*.
+
+        Skipping methods follow the layout of their reading counterparts,
+        but don't create models. Tempo changes found in mix table changes
+        are applied to the *header* though, as when measures are read.
+
+        """
+        self.skipVoice(track, header)
+
+    def skipVoice(self, track, header):
+        for _ in range(self.readInt()):
+            self.skipBeat(track, header)
+
+    def skipBeat(self, track, header):
+        flags = self.readByte()
+        if flags & 0x40:
+            status = self.readByte()
+        else:
+            status = _NORMAL_BEAT
+        self.skipDuration(flags)
+        if flags & 0x02:
+            self.skipChord()
+        if flags & 0x04:
+            self.skipIntByteSizeString()
+        if flags & 0x08:
+            self.skipBeatEffects()
+        if flags & 0x10:
+            self.skipMixTableChange(header)
+        self.skipNotes(track, status)
+
+    def skipDuration(self, flags):
+        self.skip(5 if flags & 0x20 else 1)
+
+    def skipChord(self):
+        if self.readBool():
+            self.skipNewChord()
+        else:
+            self.skipOldChord()
+
+    def skipOldChord(self):
+        self.skipIntByteSizeString()
+        if self.readInt():
+            self.skip(24)
+
+    def skipNewChord(self):
+        self.skip(25)
+        self.skipByteSizeString(22)
+        self.skip(76)
+
+    def skipBeatEffects(self):
+        flags1 = self.readByte()
+        if flags1 & 0x20:
+            self.skip(5)
+        if flags1 & 0x40:
+            self.skip(2)
+
+    def skipMixTableChange(self, header):
+        values = self.readSignedByte(7)
+        tempo = self.readInt()
+        if tempo >= 0:
+            header.tempo.value = tempo
+        self.skip(sum(value >= 0 for value in values[1:]) + (tempo >= 0))
+
+    def skipNotes(self, track, status=_NORMAL_BEAT):
+        stringFlags = self.readByte()
+        if self._noteSink is not None:
+            # Sinks can tell notes of empty beats by the status
+            self._beatStatus = status
+        for string in track.strings:
+            if stringFlags & 1 << (7 - string.number):
+                if self._noteSink is None:
+                    self.skipNote()
+                else:
+                    self._noteSink(string.number, *self.scanNote())
+
+    def skipNote(self):
+        flags = self.readByte()
+        size = 0
+        if flags & 0x20:
+            size += 2
+        if flags & 0x01:
+            size += 2
+        if flags & 0x10:
+            size += 1
+        if flags & 0x80:
+            size += 2
+        self.skip(size)
+        if flags & 0x08:
+            self.skipNoteEffects()
+
+    def scanFrets(self, track):
+        """Skip measure of the *track* and get frets of its last sounded
+        notes.
+
+        Returns a dict of frets by string numbers. Strings whose notes
+        are all tied to notes of preceding measures are left out, as
+        are strings without notes.
+
+        """
+        notes = []
+
+        def sink(string, position, flags, typePosition, dynamicsPosition, fretPosition):
+            if fretPosition >= 0 and self._beatStatus != _EMPTY_BEAT:
+                notes.append((string, typePosition, fretPosition))
+
+        noteSink, self._noteSink = self._noteSink, sink
+        try:
+            # Tempo changes are applied to a header that's thrown away
+            self.skipMeasure(track, gp.MeasureHeader())
+        finally:
+            self._noteSink = noteSink
+        frets = {}
+        for string, typePosition, fretPosition in notes:
+            self.seek(typePosition)
+            if self.readByte() in (_REST_NOTE, _TIED_NOTE):
+                continue
+            self.seek(fretPosition)
+            frets[string] = self.readSignedByte()
+        return frets
+
+    def scanNote(self):
+        """Skip note and locate its values.
+
+        Returns position of note flags, the flags, and positions of note
+        type, dynamics and fret. Position of dynamics is where they
+        would be inserted if flags don't have *0x10* set. Positions of
+        type and fret are -1 if flags don't have *0x20* set.
+
+        """
+        position = self.tell()
+        flags = self.readByte()
+        typePosition = fretPosition = -1
+        if flags & 0x20:
+            typePosition = self.tell()
+            self.skip(1)
+        if flags & 0x01:
+            self.skip(2)
+        dynamicsPosition = self.tell()
+        if flags & 0x10:
+            self.skip(1)
+        if flags & 0x20:
+            fretPosition = self.tell()
+            self.skip(1)
+        if flags & 0x80:
+            self.skip(2)
+        if flags & 0x08:
+            self.skipNoteEffects()
+        return position, flags, typePosition, dynamicsPosition, fretPosition
+
+    def skipNoteEffects(self):
+        flags = self.readByte()
+        if flags & 0x01:
+            self.skipBend()
+        if flags & 0x10:
+            self.skipGrace()
+
+    def skipBend(self):
+        self.skip(5)
+        self.skip(self.readInt() * 9)
+
+    def skipGrace(self):
+        self.skip(4)
+
     # Writing
     # =======
 
@@ -60,12 +60,16 @@ class GP4File(gp3.GP3File):
         song.lyrics = self.readLyrics()
         song.tempo = self.readInt()
         song.key = gp.KeySignature((self.readInt(), 0))
+        if self.depth == 'info':
+            return song
         self.readSignedByte()  # octave
         channels = self.readMidiChannels()
         measureCount = self.readInt()
         trackCount = self.readInt()
         self.readMeasureHeaders(song, measureCount)
         self.readTracks(song, trackCount, channels)
+        if self.depth == 'tracks':
+            return song
         self.readMeasures(song)
         return song
 
@@ -480,6 +484,49 @@ class GP4File(gp3.GP3File):
         elif period == 3:
             return gp.Duration.sixtyFourth
 
+    # Skipping
+    # ========
+
+    def skipNewChord(self):
+        self.skip(16)
+        self.skipByteSizeString(22)
+        self.skip(67)
+
+    def skipBeatEffects(self):
+        flags1 = self.readSignedByte()
+        flags2 = self.readSignedByte()
+        if flags1 & 0x20:
+            self.skip(1)
+        if flags2 & 0x04:
+            self.skipBend()
+        if flags1 & 0x40:
+            self.skip(2)
+        if flags2 & 0x02:
+            self.skip(1)
+
+    def skipMixTableChange(self, header):
+        super(GP4File, self).skipMixTableChange(header)
+        self.skip(1)
+
+    def skipNoteEffects(self):
+        flags1 = self.readSignedByte()
+        flags2 = self.readSignedByte()
+        if flags1 & 0x01:
+            self.skipBend()
+        if flags1 & 0x10:
+            self.skipGrace()
+        if flags2 & 0x04:
+            self.skip(1)
+        if flags2 & 0x08:
+            self.skip(1)
+        if flags2 & 0x10:
+            self.skipHarmonic()
+        if flags2 & 0x20:
+            self.skip(2)
+
+    def skipHarmonic(self):
+        self.skip(1)
+
     # Writing
     # =======
 
@@ -11,6 +11,28 @@ class GP5File(gp4.GP4File):
 
     """A reader for GuitarPro 5 files."""
 
+    _directionSigns = [
+        'Coda',
+        'Double Coda',
+        'Segno',
+        'Segno Segno',
+        'Fine',
+        'Da Capo',
+        'Da Capo al Coda',
+        'Da Capo al Double Coda',
+        'Da Capo al Fine',
+        'Da Segno',
+        'Da Segno al Coda',
+        'Da Segno al Double Coda',
+        'Da Segno al Fine',
+        'Da Segno Segno',
+        'Da Segno Segno al Coda',
+        'Da Segno Segno al Double Coda',
+        'Da Segno Segno al Fine',
+        'Da Coda',
+        'Da Double Coda',
+    ]
+
     # Reading
     # =======
 
@@ -73,6 +95,8 @@ class GP5File(gp4.GP4File):
         song.tempo = self.readInt()
         song.hideTempo = self.readBool() if self.versionTuple > (5, 0, 0) else False
         song.key = gp.KeySignature((self.readSignedByte(), 0))
+        if self.depth == 'info':
+            return song
         self.readInt()  # octave
         channels = self.readMidiChannels()
         directions = self.readDirections()
@@ -81,6 +105,8 @@ class GP5File(gp4.GP4File):
         trackCount = self.readInt()
         self.readMeasureHeaders(song, measureCount, directions)
         self.readTracks(song, trackCount, channels)
+        if self.depth == 'tracks':
+            return song
         self.readMeasures(song)
         return song
 
@@ -201,14 +227,10 @@ class GP5File(gp4.GP4File):
 
         """
         setup = gp.PageSetup()
-        setup.pageSize = gp.Point(self.readInt(), self.readInt())
-        l = self.readInt()
-        r = self.readInt()
-        t = self.readInt()
-        b = self.readInt()
+        width, height, l, r, t, b, proportion, setup.headerAndFooter = self.readStruct('<7ih')
+        setup.pageSize = gp.Point(width, height)
         setup.pageMargin = gp.Padding(l, t, r, b)
-        setup.scoreSizeProportion = self.readInt() / 100
-        setup.headerAndFooter = self.readShort()
+        setup.scoreSizeProportion = proportion / 100
         setup.title = self.readIntByteSizeString()
         setup.subtitle = self.readIntByteSizeString()
         setup.artist = self.readIntByteSizeString()
@@ -249,29 +271,11 @@ class GP5File(gp4.GP4File):
         - Da Double Coda
 
         """
-        signs = {
-            gp.DirectionSign('Coda'): self.readShort(),
-            gp.DirectionSign('Double Coda'): self.readShort(),
-            gp.DirectionSign('Segno'): self.readShort(),
-            gp.DirectionSign('Segno Segno'): self.readShort(),
-            gp.DirectionSign('Fine'): self.readShort()
-        }
-        fromSigns = {
-            gp.DirectionSign('Da Capo'): self.readShort(),
-            gp.DirectionSign('Da Capo al Coda'): self.readShort(),
-            gp.DirectionSign('Da Capo al Double Coda'): self.readShort(),
-            gp.DirectionSign('Da Capo al Fine'): self.readShort(),
-            gp.DirectionSign('Da Segno'): self.readShort(),
-            gp.DirectionSign('Da Segno al Coda'): self.readShort(),
-            gp.DirectionSign('Da Segno al Double Coda'): self.readShort(),
-            gp.DirectionSign('Da Segno al Fine'): self.readShort(),
-            gp.DirectionSign('Da Segno Segno'): self.readShort(),
-            gp.DirectionSign('Da Segno Segno al Coda'): self.readShort(),
-            gp.DirectionSign('Da Segno Segno al Double Coda'): self.readShort(),
-            gp.DirectionSign('Da Segno Segno al Fine'): self.readShort(),
-            gp.DirectionSign('Da Coda'): self.readShort(),
-            gp.DirectionSign('Da Double Coda'): self.readShort()
-        }
+        numbers = self.readShort(len(self._directionSigns))
+        directions = [(gp.DirectionSign(name), number)
+                      for name, number in zip(self._directionSigns, numbers)]
+        signs = dict(directions[:5])
+        fromSigns = dict(directions[5:])
         return signs, fromSigns
 
     def readMeasureHeaders(self, song, measureCount, directions):
@@ -416,8 +420,7 @@ class GP5File(gp4.GP4File):
         track.indicateTuning = bool(flags1 & 0x80)
         track.name = self.readByteSizeString(40)
         stringCount = self.readInt()
-        for i in range(7):
-            iTuning = self.readInt()
+        for i, iTuning in enumerate(self.readInt(7)):
             if stringCount > i:
                 oString = gp.GuitarString(i + 1, iTuning)
                 track.strings.append(oString)
@@ -781,6 +784,7 @@ class GP5File(gp4.GP4File):
             else:
                 value = fret
             note.value = value if 0 <= value < 100 else 0
+            self.lastFrets.update(track.number, note)
         if flags & 0x80:
             note.effect.leftHandFinger = gp.Fingering(self.readSignedByte())
             note.effect.rightHandFinger = gp.Fingering(self.readSignedByte())
@@ -897,6 +901,84 @@ class GP5File(gp4.GP4File):
             harmonic = gp.SemiHarmonic()
         return harmonic
 
+    # Skipping
+    # ========
+
+    def skipMeasure(self, track, header):
+        for _ in range(gp.Measure.maxVoices):
+            self.skipVoice(track, header)
+        self.skip(1)
+
+    def skipBeat(self, track, header):
+        super(GP5File, self).skipBeat(track, header)
+        flags2 = self.readShort()
+        if flags2 & 0x0800:
+            self.skip(1)
+
+    def skipMixTableChange(self, header):
+        # Instrument and RSE instrument
+        self.skip(17)
+        values = self.readSignedByte(6)
+        self.skipIntByteSizeString()
+        tempo = self.readInt()
+        size = sum(value >= 0 for value in values)
+        if tempo >= 0:
+            header.tempo.value = tempo
+            size += 2 if self.versionTuple > (5, 0, 0) else 1
+        # Flags and wah effect
+        self.skip(size + 2)
+        if self.versionTuple > (5, 0, 0):
+            self.skipIntByteSizeString()
+            self.skipIntByteSizeString()
+
+    def skipNote(self):
+        flags = self.readByte()
+        size = 1
+        if flags & 0x20:
+            size += 2
+        if flags & 0x10:
+            size += 1
+        if flags & 0x80:
+            size += 2
+        if flags & 0x01:
+            size += 8
+        self.skip(size)
+        if flags & 0x08:
+            self.skipNoteEffects()
+
+    def scanNote(self):
+        position = self.tell()
+        flags = self.readByte()
+        typePosition = fretPosition = -1
+        if flags & 0x20:
+            typePosition = self.tell()
+            self.skip(1)
+        dynamicsPosition = self.tell()
+        if flags & 0x10:
+            self.skip(1)
+        if flags & 0x20:
+            fretPosition = self.tell()
+            self.skip(1)
+        size = 1
+        if flags & 0x80:
+            size += 2
+        if flags & 0x01:
+            size += 8
+        self.skip(size)
+        if flags & 0x08:
+            self.skipNoteEffects()
+        return position, flags, typePosition, dynamicsPosition, fretPosition
+
+    def skipGrace(self):
+        self.skip(5)
+
+    def skipHarmonic(self):
+        harmonicType = self.readSignedByte()
+        if harmonicType == 2:
+            self.skip(3)
+        elif harmonicType == 3:
+            self.skip(1)
+
     # Writing
     # =======
 
@@ -1002,26 +1084,6 @@ class GP5File(gp4.GP4File):
         self.writeIntByteSizeString(setup.pageNumber)
 
     def writeDirections(self, measureHeaders):
-        order = ['Coda',
-                 'Double Coda',
-                 'Segno',
-                 'Segno Segno',
-                 'Fine',
-                 'Da Capo',
-                 'Da Capo al Coda',
-                 'Da Capo al Double Coda',
-                 'Da Capo al Fine',
-                 'Da Segno',
-                 'Da Segno al Coda',
-                 'Da Segno al Double Coda',
-                 'Da Segno al Fine',
-                 'Da Segno Segno',
-                 'Da Segno Segno al Coda',
-                 'Da Segno Segno al Double Coda',
-                 'Da Segno Segno al Fine',
-                 'Da Coda',
-                 'Da Double Coda']
-
         signs = {}
         for number, header in enumerate(measureHeaders, start=1):
             if header.direction is not None:
@@ -1029,7 +1091,7 @@ class GP5File(gp4.GP4File):
             if header.fromDirection is not None:
                 signs[header.fromDirection.name] = number
 
-        for name in order:
+        for name in self._directionSigns:
             self.writeShort(signs.get(name, -1))
 
     def writeMasterReverb(self, masterEffect):
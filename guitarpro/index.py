@@ -0,0 +1,131 @@
+from __future__ import division
+
+import struct
+from array import array
+
+import attr
+from six import string_types
+
+from .io import _open
+from .models import GPException
+
+__all__ = ('MeasureIndex', 'build', 'dump', 'load')
+
+_MAGIC = b'PGPI'
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sBIII')
+
+
+@attr.s
+class MeasureIndex(object):
+
+    """Positions of measures in a GP file.
+
+    Measures are stored in GP files one track after another for each
+    measure, see :meth:`guitarpro.gp3.GP3File.readMeasures`, and
+    *offsets* lists their positions in the same order. *tempos* lists
+    tempo of each measure, as it's changed by mix table changes in
+    measures.
+
+    *size* is the size of the indexed file in bytes.
+
+    """
+
+    size = attr.ib()
+    trackCount = attr.ib()
+    offsets = attr.ib(repr=False)
+    tempos = attr.ib(repr=False)
+
+    @property
+    def measureCount(self):
+        return len(self.tempos)
+
+    def offset(self, measure, track):
+        """Get position of measure *measure* of track *track*.
+
+        Both measure and track are numbered from 1.
+
+        """
+        return self.offsets[(measure - 1) * self.trackCount + track - 1]
+
+
+def build(stream, encoding='cp1252', backend='buffer'):
+    """Locate measures in a GP file.
+
+    :param stream: path to a GP file, file-like object, or contents of a
+        GP file.
+    :param encoding: decode strings in tablature using this charset.
+    :param backend: how to read a file-like object, ``'buffer'`` or
+        ``'mmap'``. See :func:`guitarpro.parse`.
+    :rtype: MeasureIndex
+
+    """
+    if backend == 'stream':
+        backend = 'buffer'
+    gpfile = _open(None, stream, 'rb', encoding=encoding, backend=backend, depth='tracks')
+    song = gpfile.readSong()
+    offsets = gpfile.scanMeasures(song)
+    tempos = array('l', (header.tempo.value for header in song.measureHeaders))
+    index = MeasureIndex(len(gpfile.data), len(song.tracks), offsets, tempos)
+    gpfile.close()
+    return index
+
+
+def dump(index, stream=None):
+    """Write measure index into a file.
+
+    The index is stored in a compact binary form: a header followed by
+    positions of measures and their tempos, each stored in 4 bytes.
+
+    :param index: an index to write.
+    :type index: MeasureIndex
+    :param stream: path to save index file or file-like object. If it's
+        ``None``, the index is returned as :class:`bytes`.
+
+    """
+    data = b''.join([
+        _HEADER.pack(_MAGIC, _FORMAT_VERSION, index.size, index.trackCount, index.measureCount),
+        struct.pack('<%dI' % len(index.offsets), *index.offsets),
+        struct.pack('<%di' % len(index.tempos), *index.tempos),
+    ])
+    if stream is None:
+        return data
+    if isinstance(stream, string_types):
+        with open(stream, 'wb') as fp:
+            fp.write(data)
+    else:
+        stream.write(data)
+
+
+def load(stream):
+    """Read measure index from a file written by :func:`dump`.
+
+    :param stream: path to index file, file-like object, or contents of
+        index file.
+    :rtype: MeasureIndex
+
+    """
+    # On Python 2 bytes are strings, so they're taken as a path
+    if isinstance(stream, string_types):
+        with open(stream, 'rb') as fp:
+            data = fp.read()
+    elif isinstance(stream, (bytes, bytearray, memoryview)):
+        data = stream
+    else:
+        data = stream.read()
+    try:
+        magic, formatVersion, size, trackCount, measureCount = _HEADER.unpack_from(data)
+    except struct.error:
+        raise GPException('not a measure index')
+    if magic != _MAGIC:
+        raise GPException('not a measure index')
+    if formatVersion != _FORMAT_VERSION:
+        raise GPException('unsupported measure index version %d' % formatVersion)
+    offsetCount = measureCount * trackCount
+    position = _HEADER.size
+    try:
+        offsets = struct.unpack_from('<%dI' % offsetCount, data, position)
+        tempos = struct.unpack_from('<%di' % measureCount, data, position + 4 * offsetCount)
+    except struct.error:
+        raise GPException('measure index is truncated')
+    return MeasureIndex(size, trackCount, array('L', offsets), array('l', tempos))
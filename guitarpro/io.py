@@ -1,14 +1,17 @@
+import io
+import mmap
 import os
+from itertools import islice
 
 from six import string_types
 
-from .iobase import GPFileBase
+from .iobase import GPFileBase, BUFFER_TYPES
 from .gp3 import GP3File
 from .gp4 import GP4File
 from .gp5 import GP5File
-from .models import GPException
+from .models import Duration, GPException
 
-__all__ = ('parse', 'write')
+__all__ = ('parse', 'parse_measures', 'iterparse', 'parse_many', 'write')
 
 _GPFILES = {
     'FICHIER GUITAR PRO v3.00': ((3, 0, 0), GP3File),
@@ -49,26 +52,248 @@ _EXT_VERSIONS = {
 }
 
 
-def parse(stream, encoding='cp1252'):
+def parse(stream, encoding='cp1252', backend='stream', depth='full', lazy=False, tracks=None, intern=False,
+          cache=None):
     """Open a GP file and read its contents.
 
-    :param stream: path to a GP file or file-like object.
+    :param stream: path to a GP file, file-like object, or contents of a
+        GP file as :class:`bytes`, :class:`bytearray`, or
+        :class:`memoryview`.
     :param encoding: decode strings in tablature using this charset.
         Given encoding must be an 8-bit charset.
+    :param backend: how to read a file-like object: ``'stream'`` reads
+        it in chunks while decoding, ``'buffer'`` reads the whole file
+        into memory first, and ``'mmap'`` maps the file into memory.
+        Streams without a file descriptor are read into memory with
+        ``'mmap'`` backend. The option is ignored for in-memory
+        contents.
+    :param depth: how much of the song to read: ``'info'`` reads only
+        score information, tempo and key, ``'tracks'`` additionally
+        reads measure headers and tracks, but leaves measures of tracks
+        empty, and ``'full'`` reads the whole song.
+    :param lazy: if true, read measures of tracks only when they are
+        accessed. Contents of the file are kept in memory, or mapped
+        with ``'mmap'`` backend, until the song is discarded. See
+        :class:`guitarpro.lazy.MeasureList`.
+    :param tracks: numbers of tracks to read, starting from 1. Other
+        tracks are removed from the song and their measures are skipped
+        without being read. By default all tracks are read.
+    :param intern: if true, equal durations and effects of beats and
+        notes are shared instead of being separate copies, which saves
+        memory. Shared values are read-only, see
+        :func:`guitarpro.models.share`.
+    :param cache: a cache of parsed songs, e.g.
+        :class:`guitarpro.cache.MemoryCache`. If the file has been
+        parsed with the same options before, the song is loaded from the
+        cache. Songs can't be read lazily with a cache.
 
     """
-    gpfile = _open(None, stream, 'rb', encoding=encoding)
+    if cache is not None:
+        if lazy:
+            raise ValueError('songs cannot be read lazily with a cache')
+        return cache.parse(stream, encoding=encoding, depth=depth, tracks=tracks, intern=intern)
+    if lazy and backend == 'stream':
+        backend = 'buffer'
+    gpfile = _open(None, stream, 'rb', encoding=encoding, backend=backend, depth=depth, lazy=lazy,
+                   tracks=tracks, intern=intern)
     song = gpfile.readSong()
-    gpfile.close()
+    if not lazy:
+        gpfile.close()
+    if tracks is not None:
+        _selectTracks(song, tracks)
+    return song
+
+
+def parse_measures(stream, tracks=None, measures=None, index=None, encoding='cp1252', backend='buffer'):
+    """Open a GP file and read only given measures of given tracks.
+
+    Measure headers and tracks are read as usual. Measures of selected
+    tracks are read lazily, see :class:`guitarpro.lazy.MeasureList`, and
+    selected measures are read right away. With a measure index they're
+    read without reading or skipping measures before them.
+
+    :param stream: path to a GP file, file-like object, or contents of a
+        GP file.
+    :param tracks: numbers of tracks to read, starting from 1. Other
+        tracks are removed from the song. By default all tracks are
+        read.
+    :param measures: numbers of measures to read, starting from 1, e.g.
+        ``range(100, 109)``. By default all measures are read.
+    :param index: measure index built from the same file by
+        :func:`guitarpro.index.build`. If it's not given, measures are
+        located by skipping them.
+    :type index: guitarpro.index.MeasureIndex
+    :param encoding: decode strings in tablature using this charset.
+    :param backend: how to read a file-like object, ``'buffer'`` or
+        ``'mmap'``. See :func:`parse`.
+
+    """
+    if backend == 'stream':
+        backend = 'buffer'
+    gpfile = _open(None, stream, 'rb', encoding=encoding, backend=backend, depth='tracks', lazy=True)
+    song = gpfile.readSong()
+    if index is None:
+        offsets = gpfile.scanMeasures(song)
+    else:
+        if ((index.size, index.trackCount, index.measureCount) !=
+                (len(gpfile.data), len(song.tracks), len(song.measureHeaders))):
+            raise GPException("measure index doesn't match the file")
+        start = Duration.quarterTime
+        for header, tempo in zip(song.measureHeaders, index.tempos):
+            header.start = start
+            header.tempo.value = tempo
+            start += header.length
+        offsets = index.offsets
+    gpfile.setMeasureLists(song, offsets)
+    if tracks is not None:
+        _selectTracks(song, tracks)
+    if measures is None:
+        measures = range(1, len(song.measureHeaders) + 1)
+    for track in song.tracks:
+        for number in measures:
+            track.measures[number - 1]
     return song
 
 
-def write(song, stream, version=None, encoding='cp1252'):
+def iterparse(stream, events=None, encoding='cp1252', backend='stream', tracks=None, keep=False):
+    """Read a GP file incrementally, yielding events as parts of the
+    song are read.
+
+    Events are tuples that start with event name:
+
+    - ``('track', track)`` for each track, before any measures.
+
+    - ``('header', header)`` for each measure header, before beats of
+      the measure. Changes of the tempo made by mix table changes in
+      the measure are applied to the header only when its beats are
+      read.
+
+    - ``('beat', trackIndex, measureIndex, voiceIndex, start, duration,
+      notes)`` for each beat, where indices start from 0, *start* is
+      beat start time and *notes* is a list of
+      :class:`~guitarpro.models.Note`.
+
+    Measures that have been read are not kept in tracks, so memory use
+    doesn't depend on the length of the song.
+
+    :param stream: path to a GP file, file-like object, or contents of a
+        GP file.
+    :param events: names of events to yield. By default all events are
+        yielded.
+    :param encoding: decode strings in tablature using this charset.
+    :param backend: how to read a file-like object. See :func:`parse`.
+    :param tracks: numbers of tracks to read, starting from 1. Measures
+        of other tracks are skipped. See :func:`parse`.
+    :param keep: if true, keep measures in tracks.
+
+    """
+    if events is None:
+        events = ('track', 'header', 'beat')
+    for event in events:
+        if event not in ('track', 'header', 'beat'):
+            raise ValueError("unknown event '%s'" % event)
+    gpfile = _open(None, stream, 'rb', encoding=encoding, backend=backend, depth='tracks', tracks=tracks)
+    with gpfile:
+        song = gpfile.readSong()
+        if 'track' in events:
+            for track in song.tracks:
+                if tracks is None or track.number in tracks:
+                    yield 'track', track
+        header = None
+        for measure in gpfile.iterMeasures(song):
+            track = measure.track
+            if measure.header is not header:
+                header = measure.header
+                if 'header' in events:
+                    yield 'header', header
+            if 'beat' in events:
+                trackIndex = track.number - 1
+                measureIndex = header.number - 1
+                for voiceIndex, voice in enumerate(measure.voices):
+                    for beat in voice.beats:
+                        yield 'beat', trackIndex, measureIndex, voiceIndex, beat.start, beat.duration, beat.notes
+            if not keep:
+                del track.measures[:]
+
+
+def parse_many(paths, workers=None, reducer=None, chunksize=1, encoding='cp1252', backend='stream', depth='full',
+               tracks=None, intern=False):
+    """Parse many GP files in a pool of processes.
+
+    Yields tuples ``(path, result)`` in the order files are parsed.
+    *result* is the song, or the value returned by *reducer*, or the
+    exception raised while parsing the file or reducing the song, so
+    broken files don't stop the batch.
+
+    Paths are consumed as files are parsed, so *paths* can be a long
+    generator, e.g. of files found with :func:`os.walk`.
+
+    :param paths: iterable of paths to GP files.
+    :param workers: number of processes. By default it's the number of
+        processors.
+    :param reducer: function called with the song in the worker
+        process. Its result is sent back instead of the song, which
+        saves pickling the whole song. It must be a module-level
+        function so it can be pickled.
+    :param chunksize: number of files sent to a worker at once. Larger
+        chunks save communication when files are small.
+    :param encoding: decode strings in tablature using this charset.
+
+    Other keyword arguments are passed to :func:`parse`.
+
+    """
+    # Process pools are only needed here, and importing them slows down
+    # importing the package
+    import multiprocessing
+    from concurrent import futures
+
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least 1')
+    kwargs = dict(encoding=encoding, backend=backend, depth=depth, tracks=tracks, intern=intern)
+    paths = iter(paths)
+    executor = futures.ProcessPoolExecutor(workers)
+    # Only a few chunks per worker are queued at once
+    queued = 2 * (workers or multiprocessing.cpu_count())
+    pending = set()
+    try:
+        while True:
+            while len(pending) < queued:
+                chunk = list(islice(paths, chunksize))
+                if not chunk:
+                    break
+                pending.add(executor.submit(_parseChunk, chunk, reducer, kwargs))
+            if not pending:
+                break
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                for item in future.result():
+                    yield item
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def _parseChunk(paths, reducer, kwargs):
+    results = []
+    for path in paths:
+        try:
+            result = parse(path, **kwargs)
+            if reducer is not None:
+                result = reducer(result)
+        except Exception as exc:
+            result = exc
+        results.append((path, result))
+    return results
+
+
+def write(song, stream=None, version=None, encoding='cp1252'):
     """Write a song into GP file.
 
     :param song: a song to write.
     :type song: guitarpro.models.Song
-    :param stream: path to save GP file or file-like object.
+    :param stream: path to save GP file or file-like object. If it's
+        ``None``, contents of the file are returned as :class:`bytes`.
     :param version: explicitly set version of GP file to save, e.g.
         ``(5, 1, 0)``.
     :type version: tuple
@@ -78,13 +303,21 @@ def write(song, stream, version=None, encoding='cp1252'):
     gpfile = _open(song, stream, 'wb', version=version, encoding=encoding)
     gpfile.writeSong(song)
     gpfile.close()
+    if stream is None:
+        return gpfile.getBytes()
 
 
-def _open(song, stream, mode='rb', version=None, encoding=None):
+def _open(song, stream, mode='rb', version=None, encoding=None, backend='stream', depth='full',
+          lazy=False, tracks=None, intern=False):
     """Open a GP file path for reading or writing."""
     if mode not in ('rb', 'wb'):
         raise ValueError("cannot read or write unless in binary mode, not '%s'" % mode)
+    if backend not in ('stream', 'buffer', 'mmap'):
+        raise ValueError("unknown backend '%s'" % backend)
+    if depth not in ('info', 'tracks', 'full'):
+        raise ValueError("unknown depth '%s'" % depth)
 
+    # On Python 2 bytes are strings, so they're taken as a path
     if isinstance(stream, string_types):
         fp = open(stream, mode)
         filename = stream
@@ -93,6 +326,7 @@ def _open(song, stream, mode='rb', version=None, encoding=None):
         filename = getattr(fp, 'name', '<file>')
 
     if mode == 'rb':
+        fp = _load(fp, backend)
         gpfilebase = GPFileBase(fp, encoding)
         versionString = gpfilebase.readVersion()
     elif mode == 'wb':
@@ -104,10 +338,45 @@ def _open(song, stream, mode='rb', version=None, encoding=None):
         versionString = _VERSIONS[(version, isClipboard)]
 
     version, GPFile = getVersionAndGPFile(versionString)
-    gpfile = GPFile(fp, encoding, version=versionString, versionTuple=version)
+    if tracks is not None:
+        tracks = frozenset(tracks)
+    gpfile = GPFile(fp, encoding, version=versionString, versionTuple=version, depth=depth,
+                    lazy=lazy, tracks=tracks, intern=intern)
+    if mode == 'rb':
+        # Hand over the data the version probe has already buffered
+        gpfile._buffer = gpfilebase._buffer
+        gpfile._position = gpfilebase._position
+        gpfile._offset = gpfilebase._offset
     return gpfile
 
 
+def _selectTracks(song, tracks):
+    """Keep only tracks with given numbers in the song."""
+    selected = []
+    for number in tracks:
+        if not 1 <= number <= len(song.tracks):
+            raise ValueError('song has no track %d' % number)
+        selected.append(song.tracks[number - 1])
+    song.tracks = selected
+
+
+def _load(fp, backend):
+    """Get the data a reader should decode according to *backend*."""
+    if isinstance(fp, BUFFER_TYPES) or backend == 'stream':
+        return fp
+    try:
+        if backend == 'mmap':
+            try:
+                # Empty files can't be mapped, they're read instead
+                if fp.tell() == 0 and os.fstat(fp.fileno()).st_size > 0:
+                    return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, io.UnsupportedOperation):
+                pass
+        return fp.read()
+    finally:
+        fp.close()
+
+
 def getVersionAndGPFile(versionString):
     try:
         return _GPFILES[versionString]
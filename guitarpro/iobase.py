@@ -1,22 +1,140 @@
+import mmap
 import struct
 
 import attr
 
+from . import models as gp
+from .utils import LastFrets
+
+#: Objects that are decoded in place instead of being read as a stream.
+BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+_BYTE = struct.Struct('B')
+_SIGNED_BYTE = struct.Struct('b')
+_BOOL = struct.Struct('?')
+_SHORT = struct.Struct('<h')
+_INT = struct.Struct('<i')
+_FLOAT = struct.Struct('<f')
+_DOUBLE = struct.Struct('<d')
+
+_STRUCTS = {}
+_PADDINGS = {}
+
+
+def _getStruct(fmt):
+    """Get a compiled struct for *fmt*, compiling it only once."""
+    try:
+        return _STRUCTS[fmt]
+    except KeyError:
+        struct_ = _STRUCTS[fmt] = struct.Struct(fmt)
+        return struct_
+
 
 @attr.s
 class GPFileBase(object):
+
+    """Base of GP file readers and writers.
+
+    *data* is either a binary file-like object or, for reading, an
+    in-memory buffer such as :class:`bytes` or :class:`mmap.mmap`, see
+    :data:`BUFFER_TYPES`. Streams are read in chunks, buffers are
+    decoded in place.
+
+    *depth* limits how much of a song readers decode: ``'info'`` stops
+    after score information, tempo and key, ``'tracks'`` stops after
+    tracks, before measures, and ``'full'`` reads the whole song.
+    If *lazy* is true, measures are only located on a quick scan and
+    are read when they are accessed, see :class:`guitarpro.lazy.MeasureList`.
+    If *tracks* is a collection of track numbers, measures of other
+    tracks are skipped.
+    If *intern* is true, equal durations and effects are shared between
+    beats and notes, see :meth:`share`.
+
+    Written data is accumulated in memory and is written to the stream
+    on :meth:`flush` or :meth:`close`. Without a stream, i.e. if *data*
+    is ``None``, the output can be retrieved with :meth:`getBytes`.
+
+    """
+
     bendPosition = 60
     bendSemitone = 25
 
+    #: Number of bytes requested from the stream at once when reading.
+    chunkSize = 64 * 1024
+
     _supportedVersions = []
 
     data = attr.ib()
     encoding = attr.ib()
     version = attr.ib(default=None)
     versionTuple = attr.ib(default=None)
+    depth = attr.ib(default='full')
+    lazy = attr.ib(default=False)
+    tracks = attr.ib(default=None)
+    intern = attr.ib(default=False)
+
+    _buffer = attr.ib(default=b'', init=False, repr=False, cmp=False)
+    _position = attr.ib(default=0, init=False, repr=False, cmp=False)
+    _offset = attr.ib(default=0, init=False, repr=False, cmp=False)
+    _stream = attr.ib(default=None, init=False, repr=False, cmp=False)
+    _output = attr.ib(default=attr.Factory(bytearray), init=False, repr=False, cmp=False)
+    _shared = attr.ib(default=attr.Factory(dict), init=False, repr=False, cmp=False)
+    _sharedDefaults = attr.ib(default=attr.Factory(dict), init=False, repr=False, cmp=False)
+    _sharedDurations = attr.ib(default=attr.Factory(dict), init=False, repr=False, cmp=False)
+    _noteSink = attr.ib(default=None, init=False, repr=False, cmp=False)
+    _beatStatus = attr.ib(default=None, init=False, repr=False, cmp=False)
+
+    #: Frets of notes read so far, used to read tied notes.
+    lastFrets = attr.ib(default=attr.Factory(LastFrets), init=False, repr=False, cmp=False)
+
+    def __attrs_post_init__(self):
+        if isinstance(self.data, BUFFER_TYPES):
+            self._buffer = self.data
+        else:
+            self._stream = self.data
 
     def close(self):
-        self.data.close()
+        self.flush()
+        if hasattr(self.data, 'close'):
+            self.data.close()
+
+    def flush(self):
+        """Write the output accumulated so far to the stream."""
+        if self._stream is not None and self._output:
+            self._stream.write(self._output)
+            del self._output[:]
+
+    def getBytes(self):
+        """Get the output that hasn't been flushed to the stream."""
+        return bytes(self._output)
+
+    def share(self, value):
+        """Get shared instance equal to *value*.
+
+        Values are shared with :func:`guitarpro.models.share` and are
+        reused for the rest of the file. Values that can't be shared
+        are returned as is.
+
+        """
+        # Most values are defaults, they are compared without hashing
+        cls = type(value)
+        default = self._sharedDefaults.get(cls)
+        if default is None:
+            default = self._sharedDefaults[cls] = gp.share(cls())
+        if value == default:
+            return default
+        shared = self._shared.get(value)
+        if shared is None:
+            try:
+                shared = gp.share(value)
+            except TypeError:
+                # Values that hold chords, bends and other models can't
+                # be shared, they're remembered to not try again
+                shared = False
+            self._shared[value] = shared
+        if shared is False:
+            return value
+        return shared
 
     def __enter__(self):
         return self
@@ -27,67 +145,162 @@ class GPFileBase(object):
     # Reading
     # =======
 
+    def tell(self):
+        """Get the position of the cursor in the file."""
+        return self._offset + self._position
+
+    def seek(self, offset):
+        """Move the cursor to *offset* bytes from the beginning of the
+        file."""
+        if self._stream is None:
+            self._position = offset
+        else:
+            self._stream.seek(offset)
+            self._buffer = b''
+            self._position = 0
+            self._offset = offset
+
     def skip(self, count):
-        return self.data.read(count)
+        position = self._position + count
+        if position <= len(self._buffer):
+            self._position = position
+        else:
+            self.readBytes(count)
 
-    def read(self, fmt, count, default=None):
+    def readBytes(self, count):
+        """Read *count* raw bytes.
+
+        Fewer bytes are returned if the stream ends earlier.
+        """
+        position = self._position
+        if position + count > len(self._buffer):
+            self._fill(count)
+            position = self._position
+        self._position = position + count
+        return bytes(self._buffer[position:position + count])
+
+    def _fill(self, size):
+        """Make at least *size* bytes available past the cursor.
+
+        Unread data is moved to the beginning of the buffer and the rest
+        is read from the stream in chunks of :attr:`chunkSize` bytes.
+        Returns false if the stream ends before *size* bytes are
+        available.
+        """
+        if self._stream is None:
+            return len(self._buffer) - self._position >= size
+        chunks = [self._buffer[self._position:]]
+        available = len(chunks[0])
+        while available < size:
+            chunk = self._stream.read(max(size - available, self.chunkSize))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            available += len(chunk)
+        self._buffer = b''.join(chunks)
+        self._offset += self._position
+        self._position = 0
+        return available >= size
+
+    def _unpack(self, struct_, default=None):
+        position = self._position
+        try:
+            value, = struct_.unpack_from(self._buffer, position)
+        except struct.error:
+            if not self._fill(struct_.size):
+                # Consume what's left, as a short read of the stream would
+                self._position = len(self._buffer)
+                if default is not None:
+                    return default
+                raise
+            position = self._position
+            value, = struct_.unpack_from(self._buffer, position)
+        self._position = position + struct_.size
+        return value
+
+    def _unpackMany(self, code, count, default=None):
+        struct_ = _getStruct('<%d%s' % (count, code))
+        if self._position + struct_.size > len(self._buffer) and not self._fill(struct_.size):
+            # Let each value fall back to default on its own
+            single = _getStruct('<' + code)
+            return [self._unpack(single, default) for i in range(count)]
+        return list(self.readRecord(struct_))
+
+    def readRecord(self, struct_):
+        """Read a fixed-layout record described by :class:`struct.Struct`.
+
+        Return a tuple of unpacked values.
+        """
+        position = self._position
         try:
-            data = self.data.read(count)
-            result = struct.unpack(fmt, data)
-            return result[0]
+            values = struct_.unpack_from(self._buffer, position)
         except struct.error:
-            if default is not None:
-                return default
-            else:
+            if not self._fill(struct_.size):
+                self._position = len(self._buffer)
                 raise
+            position = self._position
+            values = struct_.unpack_from(self._buffer, position)
+        self._position = position + struct_.size
+        return values
+
+    def readStruct(self, fmt):
+        """Read a fixed-layout record described by struct format *fmt*,
+        e.g. ``'<i6b2x'``.
+
+        Return a tuple of unpacked values.
+        """
+        return self.readRecord(_getStruct(fmt))
+
+    def read(self, fmt, count, default=None):
+        return self._unpack(_getStruct(fmt), default)
 
     def readByte(self, count=1, default=None):
         """Read 1 byte *count* times."""
-        args = ('B', 1)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_BYTE, default)
+        return self._unpackMany('B', count, default)
 
     def readSignedByte(self, count=1, default=None):
         """Read 1 signed byte *count* times."""
-        args = ('b', 1)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_SIGNED_BYTE, default)
+        return self._unpackMany('b', count, default)
 
     def readBool(self, count=1, default=None):
         """Read 1 byte *count* times as a boolean."""
-        args = ('?', 1)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_BOOL, default)
+        return self._unpackMany('?', count, default)
 
     def readShort(self, count=1, default=None):
         """Read 2 little-endian bytes *count* times as a short integer."""
-        args = ('<h', 2)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_SHORT, default)
+        return self._unpackMany('h', count, default)
 
     def readInt(self, count=1, default=None):
         """Read 4 little-endian bytes *count* times as an integer."""
-        args = ('<i', 4)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_INT, default)
+        return self._unpackMany('i', count, default)
 
     def readFloat(self, count=1, default=None):
         """Read 4 little-endian bytes *count* times as a float."""
-        args = ('<f', 4)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_FLOAT, default)
+        return self._unpackMany('f', count, default)
 
     def readDouble(self, count=1, default=None):
         """Read 8 little-endian bytes *count* times as a double."""
-        args = ('<d', 8)
-        return (self.read(*args, default=default) if count == 1 else
-                [self.read(*args, default=default) for i in range(count)])
+        if count == 1:
+            return self._unpack(_DOUBLE, default)
+        return self._unpackMany('d', count, default)
 
     def readString(self, size, length=None):
         if length is None:
             length = size
         count = size if size > 0 else length
-        s = self.data.read(count)
+        s = self.readBytes(count)
         ss = s[:(length if length >= 0 else size)]
         return ss.decode(self.encoding)
 
@@ -109,6 +322,15 @@ class GPFileBase(object):
         d = self.readInt() - 1
         return self.readByteSizeString(d)
 
+    def skipByteSizeString(self, size):
+        """Skip string read by :meth:`readByteSizeString`."""
+        length = self.readByte()
+        self.skip(size if size > 0 else length)
+
+    def skipIntByteSizeString(self):
+        """Skip string read by :meth:`readIntByteSizeString`."""
+        self.skipByteSizeString(self.readInt() - 1)
+
     def readVersion(self):
         if self.version is None:
             self.version = self.readByteSizeString(30)
@@ -118,40 +340,40 @@ class GPFileBase(object):
     # =======
 
     def placeholder(self, count, byte=b'\x00'):
-        self.data.write(byte * count)
+        if count <= 0:
+            return
+        key = byte, count
+        try:
+            padding = _PADDINGS[key]
+        except KeyError:
+            padding = _PADDINGS[key] = byte * count
+        self._output.extend(padding)
 
     def writeByte(self, data):
-        packed = struct.pack('B', int(data))
-        self.data.write(packed)
+        self._output.extend(_BYTE.pack(int(data)))
 
     def writeSignedByte(self, data):
-        packed = struct.pack('b', int(data))
-        self.data.write(packed)
+        self._output.extend(_SIGNED_BYTE.pack(int(data)))
 
     def writeBool(self, data):
-        packed = struct.pack('?', bool(data))
-        self.data.write(packed)
+        self._output.extend(_BOOL.pack(bool(data)))
 
     def writeShort(self, data):
-        packed = struct.pack('<h', int(data))
-        self.data.write(packed)
+        self._output.extend(_SHORT.pack(int(data)))
 
     def writeInt(self, data):
-        packed = struct.pack('<i', int(data))
-        self.data.write(packed)
+        self._output.extend(_INT.pack(int(data)))
 
     def writeFloat(self, data):
-        packed = struct.pack('<f', float(data))
-        self.data.write(packed)
+        self._output.extend(_FLOAT.pack(float(data)))
 
     def writeDouble(self, data):
-        packed = struct.pack('<d', float(data))
-        self.data.write(packed)
+        self._output.extend(_DOUBLE.pack(float(data)))
 
     def writeString(self, data, size=None):
         if size is None:
             size = len(data)
-        self.data.write(data.encode(self.encoding))
+        self._output.extend(data.encode(self.encoding))
         self.placeholder(size - len(data))
 
     def writeByteSizeString(self, data, size=None):
@@ -0,0 +1,161 @@
+from __future__ import division
+
+from array import array
+
+try:
+    from collections.abc import MutableSequence
+except ImportError:
+    from collections import MutableSequence
+
+from . import models as gp
+from .utils import LastFrets
+
+__all__ = ('MeasureList',)
+
+
+class MeasureList(MutableSequence):
+
+    """List of track measures that are read from the file on access.
+
+    *offsets* is an array of positions of track measures in the file, one
+    per item of *headers*. A measure is read by *gpfile* the first time
+    it's accessed and is kept in the list afterwards, so memory grows
+    with the number of measures touched rather than with the length of
+    the song.
+
+    The list can be modified as a regular list.
+
+    """
+
+    def __init__(self, gpfile, track, headers, offsets):
+        self._gpfile = gpfile
+        self._track = track
+        # Items are measures that have been read and headers of those
+        # that haven't
+        self._items = list(headers)
+        self._offsets = array(offsets.typecode, offsets)
+        self._reading = []
+        # Frets of last notes of measures that were scanned for tied
+        # notes, by offsets of the measures
+        self._scannedFrets = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        item = self._items[index]
+        if isinstance(item, gp.MeasureHeader):
+            if index < 0:
+                index += len(self)
+            item = self._read(index, item)
+        return item
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            self._items[index] = value
+            self._offsets[index] = array(self._offsets.typecode, [0] * len(value))
+        else:
+            self._items[index] = value
+
+    def __delitem__(self, index):
+        del self._items[index]
+        del self._offsets[index]
+
+    def insert(self, index, value):
+        self._items.insert(index, value)
+        self._offsets.insert(index, 0)
+
+    def __reversed__(self):
+        # While a measure is being read, the list looks as it would while
+        # reading the whole song: it ends with the measure being read.
+        if self._reading:
+            stop = self._reading[-1] + 1
+        else:
+            stop = len(self)
+        for index in range(stop - 1, -1, -1):
+            yield self[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, MeasureList)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def _read(self, index, header):
+        measure = gp.Measure(self._track, header)
+        self._items[index] = measure
+        gpfile = self._gpfile
+        position = gpfile.tell()
+        # Frets of notes that have been read before belong elsewhere in
+        # the song
+        lastFrets = gpfile.lastFrets
+        gpfile.lastFrets = LastFrets()
+        self._reading.append(index)
+        try:
+            gpfile.seek(self._offsets[index])
+            gpfile.readMeasure(measure)
+        except Exception:
+            self._items[index] = header
+            raise
+        finally:
+            self._reading.pop()
+            gpfile.lastFrets = lastFrets
+            gpfile.seek(position)
+        return measure
+
+    def findLastFret(self, string):
+        """Find fret of the last sounded note on the *string* in
+        measures preceding the measure being read.
+
+        Measures that haven't been read are scanned with
+        :meth:`~guitarpro.gp3.GP3File.scanFrets` rather than read, as
+        reading them would look for notes their tied notes continue in
+        turn. Returns ``None`` if no note is found.
+
+        """
+        gpfile = self._gpfile
+        position = gpfile.tell()
+        try:
+            for index in range(self._reading[-1] - 1, -1, -1):
+                item = self._items[index]
+                if isinstance(item, gp.MeasureHeader):
+                    offset = self._offsets[index]
+                    frets = self._scannedFrets.get(offset)
+                    if frets is None:
+                        gpfile.seek(offset)
+                        frets = self._scannedFrets[offset] = gpfile.scanFrets(self._track)
+                    fret = frets.get(string)
+                else:
+                    fret = _lastFret(item, string)
+                if fret is not None:
+                    return fret
+        finally:
+            gpfile.seek(position)
+
+    @property
+    def isRead(self):
+        """List of flags that tell which measures have been read."""
+        return [not isinstance(item, gp.MeasureHeader) for item in self._items]
+
+
+def _lastFret(measure, string):
+    for voice in reversed(measure.voices):
+        for beat in reversed(voice.beats):
+            if beat.status == gp.BeatStatus.empty:
+                continue
+            for note in reversed(beat.notes):
+                if note.string == string and note.type != gp.NoteType.rest:
+                    return note.value
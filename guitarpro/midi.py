@@ -0,0 +1,302 @@
+from __future__ import division
+
+import heapq
+import struct
+from itertools import count
+
+from six import string_types
+
+from . import models as gp
+
+__all__ = ('export',)
+
+_HEADER = struct.Struct('>4sIHHH')
+_CHUNK = struct.Struct('>4sI')
+_packEvent = struct.Struct('>3B').pack
+_packShortEvent = struct.Struct('>2B').pack
+
+# Events at the same tick are ordered by kind: notes end before settings
+# change and before next notes start
+_NOTE_OFF, _META, _CONTROL, _NOTE_ON = range(4)
+
+#: MIDI controllers set by track channels and mix table changes.
+_CONTROLLERS = (
+    ('volume', 7),
+    ('balance', 10),
+    ('reverb', 91),
+    ('tremolo', 92),
+    ('chorus', 93),
+    ('phaser', 95),
+)
+
+#: Length of dead notes in ticks, a 64th note.
+DEAD_NOTE_TIME = gp.Duration.quarterTime // 16
+
+_SMALL_LENGTHS = [struct.pack('>B', value) for value in range(0x80)]
+
+
+def export(song, stream=None, tracks=None, encoding='cp1252'):
+    """Write the song as a Standard MIDI File of type 1.
+
+    The first MIDI track holds the tempo and time signatures, and each
+    song track goes to its own MIDI track. Events of all tracks are
+    generated lazily in time order and merged in a single pass through
+    a heap, without collecting and sorting lists of events.
+
+    Tied notes extend the note they're tied to, and dead notes are
+    played as short notes of :data:`DEAD_NOTE_TIME` ticks. A note ends
+    when the next note on its string starts. Mix table changes of
+    tempo, instruments, volume, balance and effect levels take effect
+    at once. Repeats are played once, and note effects such as bends
+    and grace notes aren't rendered.
+
+    Beats are placed at their :attr:`~guitarpro.models.Beat.start`.
+    Beats without it, e.g. of songs built in code, start after the
+    previous beat of their voice, or at the start of the measure.
+    Measures start after the previous one.
+
+    :param song: a song to write.
+    :type song: guitarpro.models.Song
+    :param stream: path to save MIDI file or file-like object. If it's
+        ``None``, contents of the file are returned as :class:`bytes`.
+    :param tracks: numbers of tracks to write. By default all tracks
+        are written.
+    :param encoding: encode names of the song and tracks into given
+        8-bit charset.
+
+    """
+    selected = [track for track in song.tracks if tracks is None or track.number in tracks]
+    if song.measureHeaders:
+        origin = song.measureHeaders[0].start
+    else:
+        origin = gp.Duration.quarterTime
+    sources = [_conductorEvents(song, encoding)]
+    sources += [_trackEvents(track, route, origin, encoding) for route, track in enumerate(selected, 1)]
+    midiTracks = [_MidiTrack() for _ in sources]
+    for tick, _, route, _, event in heapq.merge(*sources):
+        midiTracks[route].add(tick, event)
+
+    chunks = [_HEADER.pack(b'MThd', 6, 1, len(midiTracks), gp.Duration.quarterTime)]
+    for midiTrack in midiTracks:
+        data = midiTrack.close()
+        chunks.append(_CHUNK.pack(b'MTrk', len(data)))
+        chunks.append(bytes(data))
+    data = b''.join(chunks)
+    if stream is None:
+        return data
+    if isinstance(stream, string_types):
+        with open(stream, 'wb') as fp:
+            fp.write(data)
+    else:
+        stream.write(data)
+
+
+class _MidiTrack(object):
+
+    """Events of a MIDI track encoded with delta times and running
+    status."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.tick = 0
+        self.status = None
+
+    def add(self, tick, event):
+        data = self.data
+        delta = tick - self.tick
+        if delta < 0x80:
+            data += _SMALL_LENGTHS[delta]
+        elif delta < 0x4000:
+            data += _packShortEvent(0x80 | delta >> 7, delta & 0x7F)
+        else:
+            data += _variableLength(delta)
+        self.tick = tick
+        status = ord(event[:1])
+        if status == self.status:
+            data += event[1:]
+        else:
+            data += event
+            # Meta events cancel running status
+            self.status = status if status < 0xF0 else None
+
+    def close(self):
+        self.add(self.tick, _meta(0x2F, b''))
+        return self.data
+
+
+def _variableLength(value):
+    result = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        result.append(0x80 | value & 0x7F)
+        value >>= 7
+    result.reverse()
+    return result
+
+
+def _meta(type_, data):
+    return b'\xff' + struct.pack('>B', type_) + bytes(_variableLength(len(data))) + data
+
+
+def _tempo(bpm):
+    microseconds = int(60000000 / max(bpm, 1))
+    return _meta(0x51, struct.pack('>I', microseconds)[1:])
+
+
+def _scale(value):
+    """Convert mix table value to MIDI controller value, as readers do
+    with values of MIDI channels."""
+    return max(0, min(127, value * 8))
+
+
+def _conductorEvents(song, encoding):
+    order = count()
+    if song.title:
+        yield 0, _META, 0, next(order), _meta(0x03, song.title.encode(encoding, 'replace'))
+    yield 0, _META, 0, next(order), _tempo(song.tempo)
+    previous = None
+    start = 0
+    for header in song.measureHeaders:
+        timeSignature = header.timeSignature
+        numerator = timeSignature.numerator
+        denominator = timeSignature.denominator.value
+        if (numerator, denominator) != previous:
+            previous = numerator, denominator
+            power = max(0, denominator.bit_length() - 1)
+            event = _meta(0x58, struct.pack('>4B', numerator, power, 24, 8))
+            yield start, _META, 0, next(order), event
+        start += header.length
+
+
+def _trackEvents(track, route, origin, encoding):
+    """Generate events of the track in time order.
+
+    Events are tuples of tick, kind, route, which is the number of the
+    MIDI track, order of the event and the event itself.
+
+    """
+    midiChannel = track.channel if track.channel is not None else gp.MidiChannel()
+    channel = 9 if track.isPercussionTrack else midiChannel.channel % 16
+    noteOn = 0x90 | channel
+    control = 0xB0 | channel
+    tuning = [0] * len(track.strings) if track.isPercussionTrack else [string.value for string in track.strings]
+    order = count()
+    tie, dead, rest = gp.NoteType.tie, gp.NoteType.dead, gp.NoteType.rest
+
+    yield 0, _META, route, next(order), _meta(0x03, track.name.encode(encoding, 'replace'))
+    if midiChannel.bank:
+        yield 0, _CONTROL, route, next(order), _packEvent(control, 0, min(127, midiChannel.bank))
+    yield 0, _CONTROL, route, next(order), _packShortEvent(0xC0 | channel, max(0, midiChannel.instrument) % 128)
+    for name, number in _CONTROLLERS:
+        yield 0, _CONTROL, route, next(order), _packEvent(control, number, min(127, getattr(midiChannel, name)))
+
+    # Note-offs are kept in a heap of [tick, order, key, active] entries.
+    # Entries of notes that are extended by ties or ended by next notes
+    # are deactivated instead of being removed.
+    offs = []
+    byString = {}
+    byKey = {}
+    nextStart = 0
+    for measure in track.measures:
+        measureStart = nextStart
+        nextStart += measure.header.length
+        voices = [voice.beats for voice in measure.voices if voice.beats]
+        starts = None
+        if len(voices) == 1:
+            beats = voices[0]
+        else:
+            # Beats of each voice are in time order, so sorting merges
+            # them
+            starts = _beatStarts(measure, measureStart, origin)
+            beats = sorted([beat for beats in voices for beat in beats], key=lambda beat: starts[id(beat)])
+        for beat in beats:
+            start = beat.start
+            if start is None:
+                if starts is None:
+                    starts = _beatStarts(measure, measureStart, origin)
+                start = starts[id(beat)]
+            else:
+                start -= origin
+            # Notes that end at the start of the beat may be tied to
+            while offs and offs[0][0] < start:
+                tick, _, key, active = heapq.heappop(offs)
+                if active:
+                    yield tick, _NOTE_OFF, route, next(order), _packEvent(noteOn, key, 0)
+            notes = beat.notes
+            tableChange = beat.effect.mixTableChange
+            if not notes and tableChange is None:
+                continue
+
+            duration = beat.duration.time
+            struck = []
+            struckKeys = set()
+            for note in notes:
+                type_ = note.type
+                if type_ is rest:
+                    continue
+                string = note.string
+                end = start + max(1, int(duration * note.durationPercent))
+                entry = byString.get(string)
+                sounds = entry is not None and entry[3] and entry[0] >= start
+                if type_ is tie:
+                    if sounds:
+                        if end > entry[0]:
+                            entry[3] = False
+                            entry = byString[string] = byKey[entry[2]] = [end, next(order), entry[2], True]
+                            heapq.heappush(offs, entry)
+                        continue
+                    # Ties that don't follow a sounding note are played
+                    # as normal notes
+                elif type_ is dead:
+                    end = start + DEAD_NOTE_TIME
+                key = max(0, min(127, note.value + tuning[string - 1]))
+                if key in struckKeys:
+                    # Unisons on different strings are struck once
+                    continue
+                # Notes end when the next note starts on their string or
+                # on their key
+                for entry in (entry if sounds else None, byKey.get(key)):
+                    if entry is not None and entry[3] and entry[0] >= start:
+                        entry[3] = False
+                        yield start, _NOTE_OFF, route, next(order), _packEvent(noteOn, entry[2], 0)
+                struck.append((string, key, max(1, min(127, note.velocity)), end))
+                struckKeys.add(key)
+
+            if tableChange is not None:
+                if tableChange.tempo is not None:
+                    # Tempo changes go to the first MIDI track
+                    yield start, _META, 0, next(order), _tempo(tableChange.tempo.value)
+                if tableChange.instrument is not None:
+                    yield (start, _CONTROL, route, next(order),
+                           _packShortEvent(0xC0 | channel, tableChange.instrument.value % 128))
+                for name, number in _CONTROLLERS:
+                    item = getattr(tableChange, name)
+                    if item is not None:
+                        yield start, _CONTROL, route, next(order), _packEvent(control, number, _scale(item.value))
+
+            for string, key, velocity, end in struck:
+                yield start, _NOTE_ON, route, next(order), _packEvent(noteOn, key, velocity)
+                entry = byString[string] = byKey[key] = [end, next(order), key, True]
+                heapq.heappush(offs, entry)
+
+    while offs:
+        tick, _, key, active = heapq.heappop(offs)
+        if active:
+            yield tick, _NOTE_OFF, route, next(order), _packEvent(noteOn, key, 0)
+
+
+def _beatStarts(measure, measureStart, origin):
+    """Get ticks of beats of the measure by ids of beats.
+
+    Beats without start follow the previous beat of their voice.
+
+    """
+    starts = {}
+    for voice in measure.voices:
+        start = measureStart
+        for beat in voice.beats:
+            if beat.start is not None:
+                start = beat.start - origin
+            starts[id(beat)] = start
+            start += beat.duration.time
+    return starts
@@ -1,5 +1,12 @@
 from __future__ import division, print_function
 
+import sys
+
+try:
+    from collections.abc import MutableSequence
+except ImportError:
+    from collections import MutableSequence
+
 import attr
 from enum import Enum, IntEnum
 from six import string_types
@@ -19,7 +26,8 @@ __all__ = (
     'Note', 'Chord', 'ChordType', 'Barre', 'ChordAlteration', 'ChordExtension',
     'PitchClass', 'BeatText', 'MixTableItem', 'WahState', 'WahEffect',
     'MixTableChange', 'BendType', 'BendPoint', 'BendEffect', 'RSEMasterEffect',
-    'RSEEqualizer', 'Accentuation', 'RSEInstrument', 'TrackRSE'
+    'RSEEqualizer', 'Accentuation', 'RSEInstrument', 'TrackRSE', 'share',
+    'unshare', 'find_difference'
 )
 
 
@@ -27,27 +35,106 @@ class GPException(Exception):
     pass
 
 
-def hashable_attrs(cls):
+def _isCompared(attribute):
+    """Tell whether attrs attribute is compared for equality."""
+    return getattr(attribute, 'eq', getattr(attribute, 'cmp', True))
+
+
+def _comparedNames(cls):
+    """Get names of compared attributes of attrs class *cls*.
+
+    Attributes with immutable defaults, like numbers, strings and enums,
+    are cheap to compare and come first. Attributes that hold lists and
+    other models come last.
+    """
+    cheap = []
+    deep = []
+    for attribute in attr.fields(cls):
+        if not _isCompared(attribute):
+            continue
+        default = attribute.default
+        if default is None or default is attr.NOTHING or isinstance(default, attr.Factory):
+            deep.append(attribute.name)
+        else:
+            cheap.append(attribute.name)
+    return cheap + deep
+
+
+def _makeEq(cls, checkClass):
+    """Make ``__eq__`` method that compares attributes of attrs class
+    *cls* one by one in order of :func:`_comparedNames`, stopping at the
+    first difference.
+
+    If *checkClass* is true, other objects must be of the same class,
+    otherwise they must be instances of *cls*.
+    """
+    if checkClass:
+        lines = ['def __eq__(self, other):',
+                 '    if other.__class__ is not self.__class__:',
+                 '        return NotImplemented']
+    else:
+        lines = ['def __eq__(self, other):',
+                 '    if not isinstance(other, cls):',
+                 '        return NotImplemented']
+    comparisons = ['self.{0} == other.{0}'.format(name) for name in _comparedNames(cls)]
+    lines.append('    return self is other or ({})'.format(' and '.join(comparisons) or 'True'))
+    namespace = {'cls': cls}
+    exec('\n'.join(lines), namespace)
+    return namespace['__eq__']
+
+
+def _isHashed(attribute):
+    """Tell whether attrs attribute is included in hash.
+
+    Attributes that don't set *hash* are hashed if they're compared.
+    """
+    if attribute.hash is None:
+        return _isCompared(attribute)
+    return attribute.hash
+
+
+def hashable_attrs(cls=None, slots=False):
     """A fully hashable attrs decorator.
 
     Converts unhashable attributes, e.g. lists, to hashable ones, e.g.
-    tuples.
-    """
-    def hash_(self):
-        obj = self
-        for field in attr.fields(self.__class__):
-            value = getattr(self, field.name)
-            if isinstance(value, (list, set)):
-                new_value = tuple(value)
-            else:
-                new_value = value
-            if new_value != value:
-                obj = attr.assoc(obj, **{field.name: new_value})
-        return hash(attr.astuple(obj, recurse=False, filter=lambda a, v: a.hash))
+    tuples, without copying the instance.
+
+    Instances are compared attribute by attribute, cheap attributes
+    first, and comparison stops at the first difference. See
+    :func:`find_difference` to locate it.
 
-    decorated = attr.s(cls, hash=False)
-    decorated.__hash__ = hash_
-    return decorated
+    If *slots* is true, attributes are stored in slots instead of
+    instance dictionary. It's used for classes that have many instances
+    in a song, like notes and beats.
+    """
+    def decorate(cls):
+        decorated = attr.s(cls, hash=False, slots=slots)
+        names = tuple(a.name for a in attr.fields(decorated) if _isHashed(a))
+        eq = _makeEq(decorated, checkClass=True)
+
+        def ne(self, other):
+            result = eq(self, other)
+            if result is NotImplemented:
+                return result
+            return not result
+
+        def hash_(self):
+            values = []
+            for name in names:
+                value = getattr(self, name)
+                if type(value).__hash__ is None:
+                    value = tuple(value)
+                values.append(value)
+            return hash(tuple(values))
+
+        decorated.__eq__ = eq
+        decorated.__ne__ = ne
+        decorated.__hash__ = hash_
+        return decorated
+
+    if cls is None:
+        return decorate
+    return decorate(cls)
 
 
 @hashable_attrs
@@ -329,6 +416,41 @@ class Song(object):
             measure = Measure(track)
             track.measures.append(measure)
 
+    def clone(self):
+        """Make a deep copy of the song.
+
+        It's much faster than :func:`copy.deepcopy`: models are copied
+        by functions made for each model class, and shared values,
+        enums and other immutable values are used by both songs
+        instead of being copied.
+
+        """
+        return _cloneSong(self)
+
+    def __copy__(self):
+        clone = object.__new__(Song)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def __deepcopy__(self, memo):
+        clone = memo[id(self)] = self.clone()
+        return clone
+
+    def __reduce__(self):
+        # Songs are pickled as snapshots, which are several times faster
+        # to make and load than the pickled graph of models
+        from . import snapshot
+        return snapshot.loads, (snapshot.dumps(self),)
+
+    def _attachHeaders(self):
+        """Restore references of measure headers to the song and their
+        repeat groups."""
+        headers = self.measureHeaders
+        self.measureHeaders = []
+        self._currentRepeatGroup = RepeatGroup()
+        for header in headers:
+            self.addMeasureHeader(header)
+
 
 @hashable_attrs
 class Tempo(object):
@@ -372,7 +494,7 @@ class DirectionSign(object):
     name = attr.ib(default='')
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class Tuplet(object):
 
     """A *n:m* tuplet."""
@@ -384,7 +506,7 @@ class Tuplet(object):
         return int(time * self.times / self.enters)
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class Duration(object):
 
     """A duration."""
@@ -675,7 +797,7 @@ class LineBreak(Enum):
     protect = 2
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class Measure(object):
 
     """A measure contains multiple voices of beats."""
@@ -736,7 +858,7 @@ class VoiceDirection(Enum):
     down = 2
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class Voice(object):
 
     """A voice contains multiple beats."""
@@ -759,7 +881,7 @@ class BeatStrokeDirection(Enum):
     down = 2
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class BeatStroke(object):
 
     """A stroke effect for beats."""
@@ -806,7 +928,7 @@ class SlapEffect(Enum):
     popping = 3
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class BeatEffect(object):
 
     """This class contains all beat effects."""
@@ -855,7 +977,7 @@ class TupletBracket(Enum):
     end = 2
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class BeatDisplay(object):
 
     """Parameters of beat display."""
@@ -886,7 +1008,7 @@ class BeatStatus(Enum):
     rest = 2
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class Beat(object):
 
     """A beat contains multiple notes."""
@@ -1065,7 +1187,7 @@ class Fingering(Enum):
     little = 4
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class NoteEffect(object):
 
     """Contains all effects which can be applied to one note."""
@@ -1137,7 +1259,7 @@ class NoteType(Enum):
     dead = 3
 
 
-@hashable_attrs
+@hashable_attrs(slots=True)
 class Note(object):
 
     """Describes a single note."""
@@ -1537,3 +1659,350 @@ class BendEffect(object):
 
     #: The max value of the bend points (y axis)
     maxValue = semitoneLength * 12
+
+
+class _SharedList(list):
+
+    """A list that can't be modified."""
+
+    def _readOnly(self, *args, **kwargs):
+        raise TypeError("shared list can't be modified")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readOnly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readOnly
+
+    def __reduce__(self):
+        return _SharedList, (list(self),)
+
+
+def _sharedClass(cls):
+    """Make read-only subclass of attrs class *cls*.
+
+    Instances of the subclass compare, hash and print as instances of
+    *cls*. As they can't change, their hash is computed only once.
+    """
+    def __new__(sharedCls, *args, **kwargs):
+        # Calling the class, e.g. in attr.evolve, creates a writable instance
+        return cls(*args, **kwargs)
+
+    def __setattr__(self, name, value):
+        raise attr.exceptions.FrozenInstanceError(
+            "shared {} can't be modified, replace it with a copy made by unshare()".format(cls.__name__))
+
+    __eq__ = _makeEq(cls, checkClass=False)
+
+    def __ne__(self, other):
+        result = __eq__(self, other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            value = cls.__hash__(self)
+            object.__setattr__(self, '_hash', value)
+            return value
+
+    def __copy__(self):
+        return unshare(self)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return share, (unshare(self),)
+
+    namespace = {
+        '__slots__': ('_hash',),
+        '__module__': cls.__module__,
+        '__qualname__': getattr(cls, '__qualname__', cls.__name__),
+        '__new__': __new__,
+        '__setattr__': __setattr__,
+        '__delattr__': __setattr__,
+        '__eq__': __eq__,
+        '__ne__': __ne__,
+        '__hash__': __hash__,
+        '__copy__': __copy__,
+        '__deepcopy__': __deepcopy__,
+        '__reduce__': __reduce__,
+    }
+    return type(cls.__name__, (cls,), namespace)
+
+
+_SHARED_CLASSES = {cls: _sharedClass(cls)
+                   for cls in (Tuplet, Duration, BeatStroke, BeatEffect, BeatDisplay, NoteEffect)}
+_SHARED_TYPES = frozenset(_SHARED_CLASSES.values())
+
+
+def share(value):
+    """Get read-only copy of *value* that can be used by many models.
+
+    Shared values are equal to their originals and are copied on write:
+    modifying them raises :exc:`attr.exceptions.FrozenInstanceError`,
+    and :func:`unshare` gives a writable copy to assign instead, e.g.
+    ``beat.duration = unshare(beat.duration)``.
+
+    Durations, tuplets, beat strokes, beat effects, beat display
+    settings and note effects can be shared, unless they hold other
+    models like chords or bends. Otherwise :exc:`TypeError` is raised.
+
+    """
+    cls = type(value)
+    if cls in _SHARED_TYPES:
+        return value
+    try:
+        sharedCls = _SHARED_CLASSES[cls]
+    except KeyError:
+        raise TypeError("{} can't be shared".format(cls.__name__))
+    shared = object.__new__(sharedCls)
+    for field in attr.fields(cls):
+        item = getattr(value, field.name)
+        if attr.has(type(item)):
+            item = share(item)
+        elif isinstance(item, list):
+            if any(attr.has(type(x)) for x in item):
+                raise TypeError("{} can't be shared".format(cls.__name__))
+            item = _SharedList(item)
+        object.__setattr__(shared, field.name, item)
+    return shared
+
+
+def unshare(value):
+    """Get writable copy of a value made by :func:`share`.
+
+    Values that aren't shared are returned as is.
+
+    """
+    sharedCls = type(value)
+    if sharedCls not in _SHARED_TYPES:
+        return value
+    copy = object.__new__(sharedCls.__bases__[0])
+    for field in attr.fields(sharedCls):
+        item = getattr(value, field.name)
+        if isinstance(item, _SharedList):
+            item = list(item)
+        else:
+            item = unshare(item)
+        object.__setattr__(copy, field.name, item)
+    return copy
+
+
+# Copying and pickling
+# ====================
+
+#: Attributes of models that hold their children, and attributes of
+#: children that refer back to the parent.
+_CHILDREN = {
+    Song: ('tracks', 'song'),
+    Track: ('measures', 'track'),
+    Measure: ('voices', 'measure'),
+    Voice: ('beats', 'voice'),
+    Beat: ('notes', 'beat'),
+}
+_PARENTS = {childCls: parent for childCls, parent in zip((Track, Measure, Voice, Beat, Note),
+                                                         ('song', 'track', 'measure', 'voice', 'beat'))}
+
+
+def _pickleWithoutParents(cls):
+    """Make instances of *cls* pickle and deep-copy without references
+    to their parents.
+
+    Pickling a model follows references to parents up to the song, so
+    copying a beat would copy the whole song, and pickling the song
+    recurses through every parent pointer. Instead, parents are left
+    out of the state and are restored by parents themselves when
+    they're unpickled. Models that are pickled alone refer to ``None``.
+    Songs themselves are pickled as snapshots.
+
+    """
+    parent = _PARENTS.get(cls)
+    children, childParent = _CHILDREN.get(cls, (None, None))
+    # Measure headers refer to the song and their repeat group
+    skipped = {parent, 'song', 'repeatGroup'}
+
+    if hasattr(cls, '__slots__'):
+        names = tuple(field.name for field in attr.fields(cls) if field.name not in skipped)
+
+        def __getstate__(self):
+            return tuple(getattr(self, name) for name in names)
+
+        def __setstate__(self, state):
+            for name, value in zip(names, state):
+                setattr(self, name, value)
+            if parent is not None:
+                setattr(self, parent, None)
+            if children is not None:
+                for child in getattr(self, children):
+                    setattr(child, childParent, self)
+    else:
+        def __getstate__(self):
+            state = {name: value for name, value in self.__dict__.items() if name not in skipped}
+            value = state.get(children)
+            if isinstance(value, MutableSequence) and not isinstance(value, list):
+                # Lazily read measures are read, as the file can't be
+                # pickled
+                state[children] = list(value)
+            return state
+
+        def __setstate__(self, state):
+            self.__dict__.update(state)
+            if parent is not None:
+                setattr(self, parent, None)
+            if children is not None:
+                for child in getattr(self, children):
+                    setattr(child, childParent, self)
+
+    def __copy__(self):
+        # Shallow copies keep the parent and share children, which still
+        # refer to the original
+        clone = object.__new__(cls)
+        if hasattr(cls, '__slots__'):
+            for field in attr.fields(cls):
+                object.__setattr__(clone, field.name, getattr(self, field.name))
+        else:
+            clone.__dict__.update(self.__dict__)
+        return clone
+
+    cls.__getstate__ = __getstate__
+    cls.__setstate__ = __setstate__
+    cls.__copy__ = __copy__
+
+
+for _cls in (MeasureHeader, Track, Measure, Voice, Beat, Note):
+    _pickleWithoutParents(_cls)
+del _cls
+
+
+#: Attributes that are restored by :func:`_cloneSong`, and attributes
+#: that refer to models copied elsewhere.
+_RESTORED = {(Song, '_currentRepeatGroup')}
+_REFERENCES = {(Measure, 'header')}
+_IMMUTABLE_TYPES = (bool, int, float, Enum) + string_types
+
+
+def _copier():
+    """Make a function that copies models for :meth:`Song.clone`.
+
+    Functions that copy each model class are generated once. Parents
+    are assigned by the copies of their parents, and measure headers
+    and repeat groups are assigned by :func:`_cloneSong`.
+
+    """
+    global _copyValue
+    if _copyValue is not None:
+        return _copyValue
+    copiers = {}
+
+    def copyList(value):
+        return [copiers[item.__class__](item) if item.__class__ in copiers else item for item in value]
+
+    def copyTuple(value):
+        return tuple(copyList(value))
+
+    copiers[list] = copyList
+    copiers[tuple] = copyTuple
+    from .lazy import MeasureList
+    copiers[MeasureList] = copyList
+    for sharedCls in _SHARED_TYPES:
+        # Shared values are immutable
+        copiers[sharedCls] = _identity
+
+    namespace = {'new': object.__new__, 'copiers': copiers}
+    classes = [cls for cls in vars(sys.modules[__name__]).values()
+               if isinstance(cls, type) and attr.has(cls) and cls not in _SHARED_TYPES]
+    for code, cls in enumerate(classes):
+        parent = _PARENTS.get(cls)
+        children, childParent = _CHILDREN.get(cls, (None, None))
+        lines = ['def copy%d(obj, cls=cls%d, new=new, copiers=copiers):' % (code, code),
+                 '    clone = new(cls)']
+        if not hasattr(cls, '__slots__'):
+            # Attributes set outside of attrs fields, e.g. Song.version
+            lines.append('    clone.__dict__.update(obj.__dict__)')
+        for field in attr.fields(cls):
+            name = field.name
+            if name == parent or (cls, name) in _RESTORED:
+                lines.append('    clone.%s = None' % name)
+                continue
+            if (cls, name) in _REFERENCES or isinstance(field.default, _IMMUTABLE_TYPES):
+                # Fields with immutable defaults hold immutable values
+                lines.append('    clone.%s = obj.%s' % (name, name))
+                continue
+            lines += ['    value = obj.%s' % name,
+                      '    copy = copiers.get(value.__class__)',
+                      '    clone.%s = copy(value) if copy is not None else value' % name]
+        if children is not None:
+            lines += ['    for child in clone.%s:' % children,
+                      '        child.%s = clone' % childParent]
+        lines.append('    return clone')
+        namespace['cls%d' % code] = cls
+        exec('\n'.join(lines), namespace)
+        copiers[cls] = namespace['copy%d' % code]
+
+    def copy(value):
+        copier = copiers.get(value.__class__)
+        return copier(value) if copier is not None else value
+
+    _copyValue = copy
+    return copy
+
+
+_copyValue = None
+
+
+def _identity(value):
+    return value
+
+
+def _cloneSong(song):
+    clone = _copier()(song)
+    headers = {id(header): copy for header, copy in zip(song.measureHeaders, clone.measureHeaders)}
+    for track in clone.tracks:
+        for measure in track.measures:
+            measure.header = headers.get(id(measure.header), measure.header)
+    clone._attachHeaders()
+    return clone
+
+
+def find_difference(a, b):
+    """Find the first difference between two models.
+
+    Models are compared the same way as with ``==``, and the path to
+    the first differing attribute is returned, e.g.
+    ``'tracks[2].measures[41].voices[0].beats[3].notes[1].value'``. If
+    lists differ in length, the path points to the first item missing
+    in one of them. If the models are equal, ``None`` is returned.
+
+    """
+    return _findDifference(a, b, '')
+
+
+def _findDifference(a, b, path):
+    if a is b:
+        return
+    cls = type(a)
+    if cls in _SHARED_TYPES:
+        cls = cls.__bases__[0]
+    if attr.has(cls):
+        otherCls = type(b)
+        if otherCls in _SHARED_TYPES:
+            otherCls = otherCls.__bases__[0]
+        if cls is not otherCls:
+            return path
+        for name in _comparedNames(cls):
+            difference = _findDifference(getattr(a, name), getattr(b, name),
+                                         path + '.' + name if path else name)
+            if difference is not None:
+                return difference
+    elif (isinstance(a, (list, tuple, MutableSequence)) and
+          isinstance(b, (list, tuple, MutableSequence)) and
+          isinstance(a, tuple) == isinstance(b, tuple)):
+        for index, (itemA, itemB) in enumerate(zip(a, b)):
+            difference = _findDifference(itemA, itemB, '%s[%d]' % (path, index))
+            if difference is not None:
+                return difference
+        if len(a) != len(b):
+            return '%s[%d]' % (path, min(len(a), len(b)))
+    elif a != b:
+        return path
@@ -0,0 +1,504 @@
+from __future__ import division
+
+import hashlib
+import marshal
+import struct
+import sys
+from array import array
+from enum import Enum
+
+import attr
+
+from . import models as gp
+from .lazy import MeasureList
+
+__all__ = ('dumps', 'loads', 'VERSION')
+
+#: Version of the snapshot layout.
+VERSION = 1
+
+_MAGIC = b'GPSNAP'
+_HEADER = struct.Struct('<6sH16sH6x')
+_SECTION = struct.Struct('<4sI')
+
+#: Columns of measures, voices, beats and notes, and their typecodes.
+#: Tables of first items of the next level have one more item than the
+#: level, so items of the *i*-th parent are ``first[i]:first[i + 1]``.
+_COLUMNS = [
+    ('TMEA', 'I'),  # number of measures of track
+    ('MHDR', 'i'),  # index of measure header in the song, or -2 - index in XHDR, -1 if it's None
+    ('MCLF', 'b'),  # measure clef
+    ('MBRK', 'b'),  # measure line break
+    ('MVOI', 'I'),  # first voice of measure
+    ('VDIR', 'b'),  # voice direction
+    ('VBEA', 'I'),  # first beat of voice
+    ('BSTA', 'i'),  # beat start, -1 if it's None
+    ('BDUR', 'I'),  # index of beat duration in DURS
+    ('BSTS', 'b'),  # beat status
+    ('BEXT', 'i'),  # index of other beat attributes in XBEA, -1 if they're default
+    ('BNOT', 'I'),  # first note of beat
+    ('NVAL', 'h'),  # note value
+    ('NVEL', 'h'),  # note velocity
+    ('NSTR', 'b'),  # note string
+    ('NTYP', 'b'),  # note type
+    ('NEXT', 'i'),  # index of other note attributes in XNOT, -1 if they're default
+]
+
+#: Attributes of beats and notes that are stored as encoded trees,
+#: unless they're default.
+_BEAT_EXTRA = ('text', 'effect', 'index', 'octave', 'display')
+_NOTE_EXTRA = ('effect', 'durationPercent', 'swapAccidentals')
+
+
+def dumps(song):
+    """Serialize the song into a snapshot.
+
+    Snapshots are binary and versioned. Score information, tracks and
+    measure headers are stored as a tree of plain values, and measures,
+    voices, beats and notes are stored in columns, one item per model.
+    Attributes of beats and notes that are rarely set, such as effects,
+    are stored in tables and referred to by index.
+
+    Snapshots are specific to PyGuitarPro and to the version of Python:
+    they're invalidated by changes of models and of :mod:`marshal`
+    format, and :func:`loads` raises :exc:`ValueError` for snapshots
+    made by other versions.
+
+    :rtype: bytes
+
+    """
+    return _Dumper(song).dump()
+
+
+def loads(data, lazy=False):
+    """Restore the song from a snapshot made by :func:`dumps`.
+
+    Columns are read from *data* in place through memory views, without
+    copying them.
+
+    Snapshots are meant to be kept by the application that made them.
+    Trees of values are decoded with :mod:`marshal`, which isn't secure
+    against maliciously constructed data, so snapshots must not be
+    loaded from untrusted sources.
+
+    :param data: contents of a snapshot as :class:`bytes`,
+        :class:`bytearray`, :class:`memoryview` or an :mod:`mmap`.
+    :param lazy: if true, create measures of tracks only when they're
+        accessed. See :class:`guitarpro.lazy.MeasureList`. *data* is
+        kept until the song is discarded.
+
+    """
+    return _Loader(data).load(lazy)
+
+
+class _Dumper(object):
+
+    def __init__(self, song):
+        self.song = song
+        self.encoder = _Encoder(song)
+        self.columns = {name: array(typecode) for name, typecode in _COLUMNS}
+        self.durations = {}
+        self.beatExtras = []
+        self.noteExtras = []
+        self.headers = []
+        self.otherHeaders = {}
+        beat = gp.Beat(None)
+        note = gp.Note(None)
+        self.defaultBeatExtra = tuple(getattr(beat, name) for name in _BEAT_EXTRA)
+        self.defaultNoteExtra = tuple(getattr(note, name) for name in _NOTE_EXTRA)
+        # Beat and note extras have different lengths, so they share the
+        # index
+        self.extraIndices = {}
+
+    def dump(self):
+        tree = self.encoder.encode(self.song)
+        for track in self.song.tracks:
+            measures = list(track.measures)
+            self.columns['TMEA'].append(len(measures))
+            for measure in measures:
+                self.addMeasure(measure)
+        columns = self.columns
+        # Close the ranges of items of the last measure, voice and beat
+        columns['MVOI'].append(len(columns['VDIR']))
+        columns['VBEA'].append(len(columns['BSTA']))
+        columns['BNOT'].append(len(columns['NVAL']))
+        durations = sorted(self.durations, key=self.durations.get)
+        sections = [(b'SONG', marshal.dumps(tree)),
+                    (b'DURS', marshal.dumps(durations)),
+                    (b'XBEA', marshal.dumps(self.beatExtras)),
+                    (b'XNOT', marshal.dumps(self.noteExtras)),
+                    (b'XHDR', marshal.dumps(self.headers))]
+        for name, _ in _COLUMNS:
+            column = columns[name]
+            if sys.byteorder == 'big':
+                column.byteswap()
+            sections.append((name.encode('ascii'), _toBytes(column)))
+        chunks = [_HEADER.pack(_MAGIC, VERSION, _FORMAT.encode('ascii'), len(sections))]
+        for name, payload in sections:
+            chunks.append(_SECTION.pack(name, len(payload)))
+            chunks.append(payload)
+            # Columns start at positions aligned to their items
+            chunks.append(b'\x00' * (-len(payload) % 8))
+        return b''.join(chunks)
+
+    def addMeasure(self, measure):
+        columns = self.columns
+        columns['MHDR'].append(self.headerIndex(measure.header))
+        columns['MCLF'].append(measure.clef.value)
+        columns['MBRK'].append(measure.lineBreak.value)
+        columns['MVOI'].append(len(columns['VDIR']))
+        for voice in measure.voices:
+            columns['VDIR'].append(voice.direction.value)
+            columns['VBEA'].append(len(columns['BSTA']))
+            for beat in voice.beats:
+                self.addBeat(beat)
+
+    def headerIndex(self, header):
+        index = self.encoder.headers.get(id(header))
+        if index is not None:
+            return index
+        if header is None:
+            return -1
+        # Headers that don't belong to the song, e.g. of new measures
+        index = self.otherHeaders.get(id(header))
+        if index is None:
+            index = self.otherHeaders[id(header)] = len(self.headers)
+            self.headers.append(self.encoder.encode(header))
+        return -2 - index
+
+    def addBeat(self, beat):
+        columns = self.columns
+        columns['BSTA'].append(beat.start if beat.start is not None else -1)
+        duration = beat.duration
+        key = (duration.value, duration.isDotted, duration.isDoubleDotted,
+               duration.tuplet.enters, duration.tuplet.times)
+        columns['BDUR'].append(self.durations.setdefault(key, len(self.durations)))
+        columns['BSTS'].append(beat.status.value)
+        extra = (beat.text, beat.effect, beat.index, beat.octave, beat.display)
+        if extra == self.defaultBeatExtra:
+            columns['BEXT'].append(-1)
+        else:
+            columns['BEXT'].append(self.addExtra(self.beatExtras, extra))
+        columns['BNOT'].append(len(columns['NVAL']))
+        for note in beat.notes:
+            columns['NVAL'].append(note.value)
+            columns['NVEL'].append(note.velocity)
+            columns['NSTR'].append(note.string)
+            columns['NTYP'].append(note.type.value)
+            extra = (note.effect, note.durationPercent, note.swapAccidentals)
+            if extra == self.defaultNoteExtra:
+                columns['NEXT'].append(-1)
+            else:
+                columns['NEXT'].append(self.addExtra(self.noteExtras, extra))
+
+    def addExtra(self, extras, extra):
+        """Get index of *extra* in the table, adding it if needed."""
+        index = self.extraIndices.get(extra)
+        if index is None:
+            index = self.extraIndices[extra] = len(extras)
+            extras.append(self.encoder.encode(extra))
+        return index
+
+
+class _Loader(object):
+
+    def __init__(self, data):
+        view = memoryview(data)
+        try:
+            magic, version, format_, count = _HEADER.unpack_from(view, 0)
+        except struct.error:
+            raise ValueError('not a snapshot')
+        if magic != _MAGIC:
+            raise ValueError('not a snapshot')
+        if version != VERSION or format_ != _FORMAT.encode('ascii'):
+            raise ValueError('snapshot was made by another version of PyGuitarPro')
+        self.sections = {}
+        position = _HEADER.size
+        for _ in range(count):
+            try:
+                name, length = _SECTION.unpack_from(view, position)
+            except struct.error:
+                raise ValueError('snapshot is truncated')
+            position += _SECTION.size
+            if position + length > len(view):
+                raise ValueError('snapshot is truncated')
+            self.sections[name.decode('ascii')] = view[position:position + length]
+            position += length + (-length % 8)
+        typecodes = dict(_COLUMNS)
+        for name, typecode in _COLUMNS:
+            setattr(self, name, _column(self.sections[name], typecodes[name]))
+        self.decode = _decoder()
+        self.durations = marshal.loads(self.sections['DURS'])
+        self.beatExtras = marshal.loads(self.sections['XBEA'])
+        self.noteExtras = marshal.loads(self.sections['XNOT'])
+        self.clefs = gp.MeasureClef._value2member_map_
+        self.lineBreaks = gp.LineBreak._value2member_map_
+        self.directions = gp.VoiceDirection._value2member_map_
+        self.statuses = gp.BeatStatus._value2member_map_
+        self.noteTypes = gp.NoteType._value2member_map_
+        # Attributes read by MeasureList
+        self.lastFrets = None
+        self._index = 0
+
+    def load(self, lazy):
+        song = self.decode(marshal.loads(self.sections['SONG']))
+        _attach(song)
+        headers = song.measureHeaders
+        otherHeaders = [self.decode(header) for header in marshal.loads(self.sections['XHDR'])]
+        index = 0
+        for track, count in zip(song.tracks, self.TMEA):
+            trackHeaders = []
+            for header in self.MHDR[index:index + count]:
+                if header >= 0:
+                    trackHeaders.append(headers[header])
+                else:
+                    trackHeaders.append(otherHeaders[-2 - header] if header != -1 else None)
+            if lazy and None not in trackHeaders:
+                track.measures = MeasureList(self, track, trackHeaders, array('L', range(index, index + count)))
+                index += count
+                continue
+            measures = track.measures
+            for header in trackHeaders:
+                measure = new(gp.Measure)
+                measure.track = track
+                measure.header = header
+                self.readMeasure(measure, index)
+                measures.append(measure)
+                index += 1
+        return song
+
+    # MeasureList reads measures at offsets, which are indices of
+    # measures here
+
+    def tell(self):
+        return self._index
+
+    def seek(self, index):
+        self._index = index
+
+    def readMeasure(self, measure, index=None):
+        if index is None:
+            index = self._index
+        decode = self.decode
+        measure.clef = self.clefs[self.MCLF[index]]
+        measure.lineBreak = self.lineBreaks[self.MBRK[index]]
+        measure.voices = voices = []
+        MVOI, VDIR, VBEA, BNOT = self.MVOI, self.VDIR, self.VBEA, self.BNOT
+        BSTA, BDUR, BSTS, BEXT = self.BSTA, self.BDUR, self.BSTS, self.BEXT
+        NVAL, NVEL, NSTR, NTYP, NEXT = self.NVAL, self.NVEL, self.NSTR, self.NTYP, self.NEXT
+        durations, beatExtras, noteExtras = self.durations, self.beatExtras, self.noteExtras
+        statuses, noteTypes = self.statuses, self.noteTypes
+        Beat, Note, Duration, Tuplet = gp.Beat, gp.Note, gp.Duration, gp.Tuplet
+        BeatEffect, BeatDisplay, NoteEffect, noneOctave = gp.BeatEffect, gp.BeatDisplay, gp.NoteEffect, gp.Octave.none
+        for v in range(MVOI[index], MVOI[index + 1]):
+            voice = new(gp.Voice)
+            voice.measure = measure
+            voice.direction = self.directions[VDIR[v]]
+            voice.beats = beats = []
+            for b in range(VBEA[v], VBEA[v + 1]):
+                beat = new(Beat)
+                beat.voice = voice
+                start = BSTA[b]
+                beat.start = start if start != -1 else None
+                value, isDotted, isDoubleDotted, enters, times = durations[BDUR[b]]
+                duration = beat.duration = new(Duration)
+                duration.value = value
+                duration.isDotted = isDotted
+                duration.isDoubleDotted = isDoubleDotted
+                tuplet = duration.tuplet = new(Tuplet)
+                tuplet.enters = enters
+                tuplet.times = times
+                beat.status = statuses[BSTS[b]]
+                extra = BEXT[b]
+                if extra == -1:
+                    beat.text = None
+                    beat.effect = BeatEffect()
+                    beat.index = None
+                    beat.octave = noneOctave
+                    beat.display = BeatDisplay()
+                else:
+                    beat.text, beat.effect, beat.index, beat.octave, beat.display = decode(beatExtras[extra])
+                beat.notes = notes = []
+                for n in range(BNOT[b], BNOT[b + 1]):
+                    note = new(Note)
+                    note.beat = beat
+                    note.value = NVAL[n]
+                    note.velocity = NVEL[n]
+                    note.string = NSTR[n]
+                    note.type = noteTypes[NTYP[n]]
+                    extra = NEXT[n]
+                    if extra == -1:
+                        note.effect = NoteEffect()
+                        note.durationPercent = 1.0
+                        note.swapAccidentals = False
+                    else:
+                        note.effect, note.durationPercent, note.swapAccidentals = decode(noteExtras[extra])
+                    notes.append(note)
+                beats.append(beat)
+            voices.append(voice)
+        return measure
+
+
+new = object.__new__
+
+
+_toBytes = getattr(array, 'tobytes', None) or array.tostring
+_fromBytes = getattr(array, 'frombytes', None) or array.fromstring
+
+
+def _column(view, typecode):
+    # Columns are little-endian
+    if sys.byteorder == 'little' and hasattr(view, 'cast'):
+        return view.cast(typecode)
+    column = array(typecode)
+    _fromBytes(column, view.tobytes())
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+#: Attributes that refer to models containing the model, and attributes
+#: that are restored when songs are loaded.
+_SKIPPED = {
+    gp.Song: ('_currentRepeatGroup',),
+    gp.Track: ('song',),
+    gp.Measure: ('track',),
+    gp.Voice: ('measure',),
+    gp.Beat: ('voice',),
+    gp.Note: ('beat',),
+}
+
+#: Attributes that are set outside of attrs fields.
+_EXTRA = {
+    gp.Song: ('version',),
+}
+
+_CLASSES = sorted((value for value in vars(gp).values()
+                   if isinstance(value, type) and attr.has(value) and value.__module__ == gp.__name__ and
+                   value not in gp._SHARED_TYPES),
+                  key=lambda cls: cls.__name__)
+_ENUMS = sorted((value for value in vars(gp).values()
+                 if isinstance(value, type) and issubclass(value, Enum) and value.__module__ == gp.__name__),
+                key=lambda cls: cls.__name__)
+_FIELDS = [tuple(field.name for field in attr.fields(cls) if field.name not in _SKIPPED.get(cls, ())) +
+           _EXTRA.get(cls, ())
+           for cls in _CLASSES]
+_CLASS_CODES = {cls: code for code, cls in enumerate(_CLASSES)}
+
+
+def _defaultInstance(cls):
+    if not all(gp._isCompared(field) for field in attr.fields(cls)):
+        return None
+    try:
+        return cls()
+    except TypeError:
+        return None
+
+
+# Models equal to their defaults are encoded as their code only
+_DEFAULTS = [_defaultInstance(cls) for cls in _CLASSES]
+# Codes of enums and plain tuples are negative
+_TUPLE = -1
+_MEMBERS = [member for cls in _ENUMS for member in cls]
+_MEMBER_CODES = {(type(member), member.value): -2 - code for code, member in enumerate(_MEMBERS)}
+
+#: Version of the tree encoding, which changes with models, and with
+#: versions of Python as format of marshal isn't stable between them.
+_FORMAT = hashlib.sha1(repr([(cls.__name__, fields) for cls, fields in zip(_CLASSES, _FIELDS)] +
+                            [repr(member) for member in _MEMBERS] +
+                            [tuple(sys.version_info[:2]), marshal.version]).encode('ascii')).hexdigest()[:16]
+
+
+class _Encoder(object):
+
+    def __init__(self, song):
+        self.headers = {id(header): index for index, header in enumerate(song.measureHeaders)}
+
+    def encode(self, value):
+        cls = type(value)
+        if cls in gp._SHARED_TYPES:
+            cls = cls.__bases__[0]
+        code = _CLASS_CODES.get(cls)
+        if code is not None:
+            default = _DEFAULTS[code]
+            if default is not None and value == default:
+                return (code,)
+            items = [code]
+            for name in _FIELDS[code]:
+                item = getattr(value, name, None)
+                if name == 'header' and cls is gp.Measure:
+                    items.append(self.headers[id(item)])
+                elif name == 'measures' and cls is gp.Track:
+                    # Measures are stored in columns
+                    items.append([])
+                else:
+                    items.append(self.encode(item))
+            return tuple(items)
+        if isinstance(value, list):
+            return [self.encode(item) for item in value]
+        if isinstance(value, Enum):
+            return (_MEMBER_CODES[cls, value.value],)
+        if cls is tuple:
+            return (_TUPLE,) + tuple(self.encode(item) for item in value)
+        return value
+
+
+def _decoder():
+    """Make a function that decodes encoded values.
+
+    Models are created by functions generated for each model class.
+    Plain values and enums are assigned without calling a function, as
+    they make most of the tree.
+
+    """
+    global _decodeValue
+    if _decodeValue is not None:
+        return _decodeValue
+    members = {-2 - code: member for code, member in enumerate(_MEMBERS)}
+    decoders = []
+    containers = (tuple, list)
+
+    def decode(value):
+        if value.__class__ is tuple:
+            code = value[0]
+            if code >= 0:
+                return decoders[code](value)
+            elif code != _TUPLE:
+                return members[code]
+            value = value[1:]
+        items = [decode(item) if item.__class__ in containers else item for item in value]
+        return tuple(items) if value.__class__ is tuple else items
+
+    namespace = {'new': object.__new__, 'members': members, 'decoders': decoders, 'decode': decode}
+    for code, (cls, fields) in enumerate(zip(_CLASSES, _FIELDS)):
+        names = ['value%d' % index for index in range(len(fields))]
+        lines = ['def decode%d(value, cls=cls%d, new=new, members=members):' % (code, code)]
+        if _DEFAULTS[code] is not None:
+            lines += ['    if len(value) == 1:',
+                      '        return cls()']
+        if names:
+            lines.append('    _, %s, = value' % ', '.join(names))
+        lines.append('    obj = new(cls)')
+        for name, field in zip(names, fields):
+            lines += ['    if %s.__class__ is tuple:' % name,
+                      '        %s = decoders[%s[0]](%s) if %s[0] >= 0 else decode(%s)' % ((name,) * 5),
+                      '    elif %s.__class__ is list:' % name,
+                      '        %s = decode(%s) if %s else []' % ((name,) * 3),
+                      '    obj.%s = %s' % (field, name)]
+        lines.append('    return obj')
+        namespace['cls%d' % code] = cls
+        exec('\n'.join(lines), namespace)
+        decoders.append(namespace['decode%d' % code])
+    _decodeValue = decode
+    return decode
+
+
+_decodeValue = None
+
+
+def _attach(song):
+    """Restore references to the song and repeat groups of measure
+    headers."""
+    song._attachHeaders()
+    for track in song.tracks:
+        track.song = song
@@ -0,0 +1,162 @@
+from __future__ import division
+
+from . import models as gp
+from .utils import LastFrets
+
+__all__ = ('transpose', 'retune', 'remap', 'scale_velocity', 'note_at')
+
+
+def transpose(song, semitones, tracks=None, strings=None):
+    """Transpose notes of the song by a number of semitones.
+
+    Dead notes are not changed, and tied notes repeat the transposed
+    fret of the note they continue. Notes that don't fit on the
+    fretboard are capped and become dead.
+
+    :param tracks: numbers of tracks to transpose, starting from 1. By
+        default all tracks except percussion ones are transposed.
+    :param strings: numbers of strings to transpose, e.g. ``[5, 6]``.
+        By default all strings are transposed.
+    :returns: indices of notes that didn't fit on the fretboard, see
+        :func:`note_at`.
+
+    """
+    outOfRange = []
+    for trackIndex, track in _selectTracks(song, tracks):
+        shifts = {string.number: semitones for string in track.strings
+                  if strings is None or string.number in strings}
+        _shiftFrets(track, trackIndex, shifts, outOfRange)
+    return outOfRange
+
+
+def retune(song, tuning, tracks=None):
+    """Change tuning of tracks keeping pitches of their notes.
+
+    Frets of notes are moved by the difference between old and new
+    tuning of their strings. Notes that don't fit on the fretboard are
+    capped and become dead, as in :func:`transpose`.
+
+    :param tuning: MIDI values of open strings, starting from the first
+        string, e.g. ``[64, 59, 55, 50, 45, 38]`` for drop D.
+    :param tracks: numbers of tracks to retune, starting from 1. By
+        default all tracks except percussion ones are retuned.
+    :returns: indices of notes that didn't fit on the fretboard, see
+        :func:`note_at`.
+
+    """
+    selected = _selectTracks(song, tracks)
+    # Tracks are checked before any is retuned, so the song is left as it
+    # is on errors
+    for _, track in selected:
+        if len(track.strings) != len(tuning):
+            raise ValueError("track %d has %d strings, tuning has %d" %
+                             (track.number, len(track.strings), len(tuning)))
+    outOfRange = []
+    for trackIndex, track in selected:
+        shifts = {}
+        for string, value in zip(track.strings, tuning):
+            if string.value != value:
+                shifts[string.number] = string.value - value
+            string.value = value
+        _shiftFrets(track, trackIndex, shifts, outOfRange)
+    return outOfRange
+
+
+def remap(song, mapping, tracks=None):
+    """Replace values of notes using a lookup table.
+
+    Values missing from *mapping* are left as they are. It's meant to
+    convert drum kits of percussion tracks, e.g. ``examples/dfh.py``.
+
+    :param mapping: a :class:`dict` or a sequence, indexed by note
+        values.
+    :param tracks: numbers of tracks to process, starting from 1. By
+        default only percussion tracks are processed.
+
+    """
+    if not isinstance(mapping, dict):
+        mapping = dict(enumerate(mapping))
+    for _, track in _selectTracks(song, tracks, percussion=True):
+        for note in _iterNotes(track):
+            if note.type != gp.NoteType.rest:
+                note.value = mapping.get(note.value, note.value)
+
+
+def scale_velocity(song, factor, tracks=None):
+    """Multiply velocities of notes by *factor*.
+
+    Velocities are capped between
+    :attr:`~guitarpro.models.Velocities.minVelocity` and 127.
+
+    :param tracks: numbers of tracks to process, starting from 1. By
+        default all tracks are processed.
+
+    """
+    minVelocity = gp.Velocities.minVelocity
+    for track in song.tracks:
+        if tracks is not None and track.number not in tracks:
+            continue
+        for note in _iterNotes(track):
+            note.velocity = max(minVelocity, min(127, int(round(note.velocity * factor))))
+
+
+def note_at(song, index):
+    """Get the note at *index* returned by :func:`transpose` or
+    :func:`retune`.
+
+    Indices are tuples of positions of the track in ``song.tracks``,
+    of the measure in ``track.measures``, of the voice, the beat and
+    the note, all starting from 0, e.g. ``(0, 11, 0, 3, 1)``. A list of
+    them converts to an array of shape ``(n, 5)`` with
+    :func:`numpy.array`.
+
+    """
+    trackIndex, measureIndex, voiceIndex, beatIndex, noteIndex = index
+    measure = song.tracks[trackIndex].measures[measureIndex]
+    return measure.voices[voiceIndex].beats[beatIndex].notes[noteIndex]
+
+
+def _selectTracks(song, tracks, percussion=False):
+    """Get tracks to process with their positions in the song."""
+    if tracks is None:
+        return [(index, track) for index, track in enumerate(song.tracks)
+                if track.isPercussionTrack == percussion]
+    return [(index, track) for index, track in enumerate(song.tracks) if track.number in tracks]
+
+
+def _iterNotes(track):
+    for measure in track.measures:
+        for voice in measure.voices:
+            for beat in voice.beats:
+                for note in beat.notes:
+                    yield note
+
+
+def _shiftFrets(track, trackIndex, shifts, outOfRange):
+    """Add *shifts* to frets of notes on strings with given numbers.
+
+    Indices of notes that don't fit on the fretboard are appended to
+    *outOfRange*.
+
+    """
+    if not shifts:
+        return
+    lastFrets = LastFrets()
+    fretCount = track.fretCount
+    tie, normal = gp.NoteType.tie, gp.NoteType.normal
+    for measureIndex, measure in enumerate(track.measures):
+        for voiceIndex, voice in enumerate(measure.voices):
+            for beatIndex, beat in enumerate(voice.beats):
+                for noteIndex, note in enumerate(beat.notes):
+                    shift = shifts.get(note.string)
+                    if shift is None:
+                        continue
+                    if note.type is tie:
+                        note.value = lastFrets.get(track.number, note.string, note.value)
+                    elif note.type is normal:
+                        value = note.value + shift
+                        note.value = max(0, min(fretCount, value))
+                        if note.value != value:
+                            note.type = gp.NoteType.dead
+                            outOfRange.append((trackIndex, measureIndex, voiceIndex, beatIndex, noteIndex))
+                    lastFrets.update(track.number, note)
@@ -1,6 +1,8 @@
 import re
 import math
 
+from .models import BeatStatus, NoteType
+
 
 def clamp(iterable, length, fillvalue=None):
     """Set length of iterable to given length.
@@ -23,6 +25,49 @@ def hexify(string):
     return ' '.join(re.findall('[0-9a-zA-Z]{2}', string.encode('hex')))
 
 
+class LastFrets(object):
+
+    """Table of last sounded frets on strings of tracks.
+
+    A tied note continues the previous note on the same string, so its
+    fret is the fret of that note. When notes are passed to
+    :meth:`update` in order they're played, :meth:`get` returns the
+    fret a tied note on the string should have. Tracks and strings are
+    referred to by their numbers.
+
+    """
+
+    def __init__(self):
+        self._frets = {}
+
+    def get(self, track, string, default=None):
+        """Get last sounded fret on the *string* of the *track*."""
+        frets = self._frets.get(track)
+        if frets is None:
+            return default
+        return frets.get(string, default)
+
+    def set(self, track, string, fret):
+        """Set last sounded fret on the *string* of the *track*."""
+        self._frets.setdefault(track, {})[string] = fret
+
+    def update(self, track, note):
+        """Remember fret of the *note* on the *track*.
+
+        Rests and notes of empty beats are ignored.
+
+        """
+        if note.type != NoteType.rest and note.beat.status != BeatStatus.empty:
+            self.set(track, note.string, note.value)
+
+    def clear(self, track=None):
+        """Forget frets of the *track*, or of all tracks."""
+        if track is None:
+            self._frets.clear()
+        else:
+            self._frets.pop(track, None)
+
+
 try:
     bit_length = int.bit_length
 except AttributeError:
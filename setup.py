@@ -12,12 +12,17 @@ install_requires = [
     'attrs',
     'six',
     'enum34',
+    'futures; python_version < "3"',
 ]
 
 tests_require = [
     'pytest',
 ]
 
+extras_require = {
+    'numpy': ['numpy'],
+}
+
 try:
     import argparse  # noqa
 except ImportError:
@@ -41,6 +46,7 @@ setup(
     zip_safe=False,
     setup_requires=setup_requires,
     install_requires=install_requires,
+    extras_require=extras_require,
     tests_require=tests_require,
     classifiers=[
         'Development Status :: 4 - Beta',
@@ -0,0 +1,67 @@
+import sys
+from os import path
+
+import pytest
+
+import guitarpro
+
+if sys.version_info < (3, 5):
+    pytest.skip('guitarpro.aio requires Python 3.5', allow_module_level=True)
+
+import asyncio  # noqa: E402
+from guitarpro import aio  # noqa: E402
+
+LOCATION = path.dirname(__file__)
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_parse_and_write():
+    filepath = path.join(LOCATION, 'Effects.gp5')
+    with open(filepath, 'rb') as fp:
+        data = fp.read()
+    expected = guitarpro.parse(filepath)
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        songs = await asyncio.gather(aio.parse(data), aio.parse(reader), aio.parse(filepath))
+        return songs, await aio.write(songs[0])
+
+    songs, written = run(main())
+    assert songs == [expected] * 3
+    assert written == guitarpro.write(expected)
+
+
+def test_limit(monkeypatch):
+    filepath = path.join(LOCATION, 'Effects.gp3')
+    original = guitarpro.io.parse
+    running = []
+    counts = []
+
+    def parse(*args, **kwargs):
+        running.append(None)
+        counts.append(len(running))
+        try:
+            return original(*args, **kwargs)
+        finally:
+            running.pop()
+
+    async def main():
+        await asyncio.gather(*[aio.parse(filepath) for _ in range(6)])
+
+    monkeypatch.setattr(guitarpro.io, 'parse', parse)
+    aio.configure(limit=2)
+    try:
+        run(main())
+    finally:
+        aio.configure()
+    assert len(counts) == 6
+    assert max(counts) <= 2
@@ -0,0 +1,66 @@
+from os import path
+
+import pytest
+
+import guitarpro
+from guitarpro import cache
+
+LOCATION = path.dirname(__file__)
+FILES = ['Effects.gp3', 'Effects.gp4', 'Effects.gp5', 'Mastodon - Ghost of Karelia.gp5']
+
+
+def test_memory_cache():
+    songs = cache.MemoryCache()
+    for filename in FILES:
+        filepath = path.join(LOCATION, filename)
+        expected = guitarpro.parse(filepath)
+        assert guitarpro.parse(filepath, cache=songs) == expected
+        song = guitarpro.parse(filepath, cache=songs)
+        assert song == expected
+        assert guitarpro.write(song) == guitarpro.write(expected)
+        expected = guitarpro.parse(filepath, depth='tracks')
+        assert guitarpro.parse(filepath, depth='tracks', cache=songs) == expected
+        assert guitarpro.parse(filepath, depth='tracks', cache=songs) == expected
+    assert (songs.hits, songs.misses, songs.evictions) == (len(FILES) * 2, len(FILES) * 2, 0)
+
+    # Least recently used song is evicted
+    full = cache.MemoryCache()
+    filepaths = [path.join(LOCATION, filename) for filename in FILES[:3]]
+    for filepath in filepaths:
+        guitarpro.parse(filepath, cache=full)
+    songs = cache.MemoryCache(maxBytes=full.size - 1)
+    for filepath in filepaths:
+        guitarpro.parse(filepath, cache=songs)
+    assert (len(songs), songs.evictions) == (2, 1)
+    guitarpro.parse(filepaths[0], cache=songs)
+    assert (songs.hits, songs.misses) == (0, 4)
+
+
+def test_directory_cache(tmpdir):
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    expected = guitarpro.parse(filepath, intern=True)
+    songs = cache.DirectoryCache(str(tmpdir))
+    guitarpro.parse(filepath, cache=songs)
+    assert songs.misses == 1
+
+    # Songs are kept between processes
+    songs = cache.DirectoryCache(str(tmpdir))
+    song = guitarpro.parse(filepath, intern=True, cache=songs)
+    assert (songs.hits, songs.misses) == (1, 0)
+    assert song == expected
+    with open(filepath, 'rb') as fp:
+        assert guitarpro.parse(fp, cache=songs) == expected
+        assert fp.closed
+
+    songs.maxBytes = 4
+    songs.set('0' * 40, b'song')
+    assert songs.evictions == 1 and songs.size == 4
+    songs.set('0' * 40, b'tab')
+    assert songs.get('0' * 40) == b'tab' and songs.size == 3
+
+    # Temporary files are removed when writing fails
+    with pytest.raises(TypeError):
+        songs.set('1' * 40, u'tab')
+    assert len(tmpdir.listdir()) == 1
+    songs.clear()
+    assert tmpdir.listdir() == []
@@ -0,0 +1,68 @@
+from os import path
+
+import pytest
+
+import guitarpro
+from guitarpro import columnar
+
+LOCATION = path.dirname(__file__)
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'Effects.gp4', 'Mastodon - Ghost of Karelia.gp5'])
+def test_export(filename):
+    numpy = pytest.importorskip('numpy')
+    filepath = path.join(LOCATION, filename)
+    song = guitarpro.parse(filepath)
+    notes = columnar.export(song)
+    assert numpy.array_equal(columnar.export(filepath), notes)
+
+    expected = []
+    for measures in zip(*[track.measures for track in song.tracks]):
+        for measure in measures:
+            for voiceIndex, voice in enumerate(measure.voices):
+                for beat in voice.beats:
+                    for note in beat.notes:
+                        expected.append((measure.track.number, measure.number, voiceIndex, beat.start,
+                                         beat.duration.time, note.string, note.value, note.realValue,
+                                         note.velocity, note.type.value, note.effect.palmMute))
+    assert len(notes) == len(expected)
+    actual = zip(notes['track'], notes['measure'], notes['voice'], notes['start'], notes['duration'],
+                 notes['string'], notes['fret'], notes['pitch'], notes['velocity'], notes['type'],
+                 notes['effects'] & columnar.PALM_MUTE != 0)
+    assert [tuple(row) for row in actual] == expected
+
+
+def test_export_tracks():
+    numpy = pytest.importorskip('numpy')
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    notes = columnar.export(filepath, tracks=[2])
+    assert set(notes['track']) == {2}
+    assert numpy.array_equal(columnar.export(guitarpro.parse(filepath), tracks=[2]), notes)
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'Mastodon - Ghost of Karelia.gp5'])
+def test_note_table(filename):
+    filepath = path.join(LOCATION, filename)
+    table = columnar.load(filepath)
+    assert guitarpro.parse(table.write()) == guitarpro.parse(filepath)
+
+    frets = list(table.fret)
+    table.transpose(2, tracks=[1])
+    table.scaleVelocity(0.5)
+    song = guitarpro.parse(table.write())
+    notes = [note
+             for measures in zip(*[track.measures for track in song.tracks])
+             for measure in measures
+             for voice in measure.voices
+             for beat in voice.beats
+             for note in beat.notes]
+    assert len(notes) == len(table)
+    for note, track, fret, transposed, velocity, type_ in zip(notes, table.track, frets, table.fret,
+                                                             table.velocity, table.type):
+        assert note.type.value == type_
+        if type_ == guitarpro.NoteType.normal.value:
+            assert note.value == transposed
+            if track != 1:
+                assert transposed == fret
+        # Velocities are stored as dynamics
+        assert note.velocity == (velocity + 1) // 16 * 16 - 1
@@ -1,4 +1,6 @@
+import operator
 import os
+import struct
 from os import path
 
 import pytest
@@ -52,7 +54,7 @@ def test_conversion(output_folder, filename):
     destpath = path.join(output_folder, filename + ext)
     guitarpro.write(song_a, destpath)
     song_b = guitarpro.parse(destpath)
-    assert song_a == song_b
+    assert song_a == song_b, guitarpro.find_difference(song_a, song_b)
 
 
 def test_clipboard(output_folder):
@@ -89,6 +91,186 @@ def test_guess_version(output_folder):
         assert song_b.versionTuple == versionTuple
 
 
+@pytest.mark.parametrize('backend', ['buffer', 'mmap'])
+def test_backend(backend):
+    filepath = path.join(LOCATION, 'Demo v5.gp5')
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath, backend=backend)
+    assert song_a == song_b
+    with open(filepath, 'rb') as fp:
+        song_c = guitarpro.parse(fp, backend=backend)
+    assert song_a == song_c
+
+
+@pytest.mark.parametrize('backend', ['buffer', 'mmap'])
+def test_backend_empty_file(output_folder, backend):
+    destpath = path.join(output_folder, 'empty.gp5')
+    open(destpath, 'wb').close()
+    with open(destpath, 'rb') as fp:
+        with pytest.raises(struct.error):
+            guitarpro.parse(fp, backend=backend)
+        assert fp.closed
+
+
+@pytest.mark.parametrize('buffer_type', [bytes, bytearray, memoryview])
+def test_parse_buffer(buffer_type):
+    filepath = path.join(LOCATION, 'Effects.gp4')
+    with open(filepath, 'rb') as fp:
+        data = fp.read()
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(buffer_type(data))
+    assert song_a == song_b
+
+
+@pytest.mark.parametrize('version', [(3, 0, 0), (4, 0, 0), (5, 1, 0)])
+def test_write_bytes(output_folder, version):
+    filepath = path.join(LOCATION, 'Effects.gp4')
+    song_a = guitarpro.parse(filepath)
+    data = guitarpro.write(song_a, version=version)
+    destpath = path.join(output_folder, 'Effects-bytes.gp%d' % version[0])
+    guitarpro.write(song_a, destpath, version=version)
+    with open(destpath, 'rb') as fp:
+        assert data == fp.read()
+    song_b = guitarpro.parse(data)
+    assert song_b.versionTuple == version
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'Effects.gp4', 'Demo v5.gp5'])
+def test_depth(filename):
+    filepath = path.join(LOCATION, filename)
+    song = guitarpro.parse(filepath)
+    info = guitarpro.parse(filepath, depth='info')
+    assert (info.title, info.artist, info.tempo, info.key) == (song.title, song.artist, song.tempo, song.key)
+    assert info.tracks == []
+    tracks = guitarpro.parse(filepath, depth='tracks')
+    assert len(tracks.measureHeaders) == len(song.measureHeaders)
+    assert [track.name for track in tracks.tracks] == [track.name for track in song.tracks]
+    assert [track.strings for track in tracks.tracks] == [track.strings for track in song.tracks]
+    assert all(track.measures == [] for track in tracks.tracks)
+    with pytest.raises(ValueError):
+        guitarpro.parse(filepath, depth='measures')
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'Chords.gp4', 'Demo v5.gp5', 'Mastodon - Ghost of Karelia.gp5'])
+def test_lazy(filename):
+    filepath = path.join(LOCATION, filename)
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath, lazy=True)
+    measures = song_b.tracks[0].measures
+    assert len(measures) == len(song_a.tracks[0].measures)
+    assert measures[-1] == song_a.tracks[0].measures[-1]
+    assert measures.isRead.count(True) == 1
+    assert song_a == song_b
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_select_tracks(lazy):
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath, lazy=lazy, tracks=[3, 1])
+    assert song_b.tracks == [song_a.tracks[2], song_a.tracks[0]]
+    assert [track.number for track in song_b.tracks] == [3, 1]
+    with pytest.raises(ValueError):
+        guitarpro.parse(filepath, tracks=[5])
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'CarpeDiem - Ink.gp4', 'Mastodon - Ghost of Karelia.gp5'])
+def test_iterparse(filename):
+    filepath = path.join(LOCATION, filename)
+    song = guitarpro.parse(filepath)
+    beats = []
+    for header in song.measureHeaders:
+        for track in song.tracks:
+            measure = track.measures[header.number - 1]
+            for voiceIndex, voice in enumerate(measure.voices):
+                for beat in voice.beats:
+                    beats.append(('beat', track.number - 1, header.number - 1, voiceIndex,
+                                  beat.start, beat.duration, beat.notes))
+    events = list(guitarpro.iterparse(filepath))
+    assert [event for event in events if event[0] == 'beat'] == beats
+    assert [event[1] for event in events if event[0] == 'header'] == song.measureHeaders
+    tracks = [event[1] for event in events if event[0] == 'track']
+    assert [(track.number, track.name) for track in tracks] == [(track.number, track.name) for track in song.tracks]
+    assert all(len(track.measures) < len(song.measureHeaders) for track in tracks)
+
+
+@pytest.mark.parametrize('filename', ['CarpeDiem - I Ching.gp3', 'CarpeDiem - Ink.gp4', 'Deep Purple - Love Child.gp5'])
+def test_tied_notes(filename):
+    song = guitarpro.parse(path.join(LOCATION, filename))
+    tiedNotes = 0
+    for track in song.tracks:
+        frets = {}
+        for measure in track.measures:
+            for voice in measure.voices:
+                for beat in voice.beats:
+                    if beat.status == guitarpro.BeatStatus.empty:
+                        continue
+                    for note in beat.notes:
+                        if note.type == guitarpro.NoteType.tie:
+                            assert note.value == max(0, frets.get(note.string, 0))
+                            tiedNotes += 1
+                        if note.type != guitarpro.NoteType.rest:
+                            frets[note.string] = note.value
+    assert tiedNotes > 0
+
+
+@pytest.mark.parametrize('version', [(3, 0, 0), (4, 0, 0), (5, 1, 0)])
+def test_long_tie(output_folder, version):
+    # A note tied through hundreds of measures
+    song = guitarpro.Song()
+    track = song.tracks[0]
+    track.measures = []
+    for number in range(1, 301):
+        header = guitarpro.MeasureHeader(number=number)
+        song.addMeasureHeader(header)
+        measure = guitarpro.Measure(track, header)
+        track.measures.append(measure)
+        voice = measure.voices[0]
+        beat = guitarpro.Beat(voice, status=guitarpro.BeatStatus.normal)
+        noteType = guitarpro.NoteType.normal if number == 1 else guitarpro.NoteType.tie
+        beat.notes.append(guitarpro.Note(beat, value=5, string=2, type=noteType))
+        voice.beats.append(beat)
+    destpath = path.join(output_folder, 'Long tie.gp%d' % version[0])
+    guitarpro.write(song, destpath, version=version)
+
+    song = guitarpro.parse(destpath, lazy=True)
+    measures = song.tracks[0].measures
+    assert measures[-1].voices[0].beats[0].notes[0].value == 5
+    assert measures.isRead.count(True) == 1
+    assert song == guitarpro.parse(destpath)
+    song = guitarpro.parse_measures(destpath, measures=[300])
+    assert song.tracks[0].measures[-1].voices[0].beats[0].notes[0].value == 5
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'Effects.gp4', 'Mastodon - Ghost of Karelia.gp5'])
+def test_intern(filename):
+    filepath = path.join(LOCATION, filename)
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath, intern=True)
+    assert song_a == song_b
+    beats = [beat for measure in song_b.tracks[0].measures for voice in measure.voices for beat in voice.beats]
+    durations = {id(beat.duration) for beat in beats}
+    assert len(durations) < len(beats)
+    beat = beats[0]
+    shared = beat.duration
+    with pytest.raises(AttributeError):
+        beat.duration.value *= 2
+    beat.duration = guitarpro.unshare(beat.duration)
+    beat.duration.value *= 2
+    assert beat.duration.value == shared.value * 2
+
+
+def test_parse_many():
+    filepaths = [path.join(LOCATION, filename) for filename in TESTS]
+    broken = path.join(LOCATION, 'test_conversion.py')
+    results = dict(guitarpro.parse_many(filepaths + [broken], workers=2, chunksize=3,
+                                        reducer=operator.attrgetter('title')))
+    assert set(results) == set(filepaths + [broken])
+    assert isinstance(results.pop(broken), guitarpro.GPException)
+    for filepath, title in results.items():
+        assert title == guitarpro.parse(filepath).title
+
+
 @pytest.fixture
 def output_folder():
     try:
@@ -0,0 +1,57 @@
+import copy
+import pickle
+from os import path
+
+import pytest
+
+import guitarpro
+
+LOCATION = path.dirname(__file__)
+
+
+def test_diff_note():
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath)
+    assert guitarpro.diff(song_a, song_b) == []
+    song_b.tracks[1].measures[30].voices[0].beats[2].notes[0].value += 2
+    ops = guitarpro.diff(song_a, song_b)
+    assert ops == [('set', ('tracks', 1, 'measures', 30, 'voices', 0, 'beats', 2, 'notes', 0, 'value'),
+                    song_b.tracks[1].measures[30].voices[0].beats[2].notes[0].value)]
+    guitarpro.patch(song_a, ops)
+    assert song_a == song_b
+
+
+def test_diff_measures():
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath)
+    header = copy.deepcopy(song_b.measureHeaders[10])
+    header.timeSignature.numerator = 7
+    song_b.measureHeaders.insert(3, header)
+    for track in song_b.tracks:
+        measure = guitarpro.Measure(track, header)
+        measure.voices[0].beats.append(guitarpro.Beat(measure.voices[0], status=guitarpro.BeatStatus.rest))
+        track.measures.insert(3, measure)
+    del song_b.tracks[0].measures[5].voices[0].beats[0]
+    song_b = guitarpro.parse(guitarpro.write(song_b))
+
+    ops = pickle.loads(pickle.dumps(guitarpro.diff(song_a, song_b)))
+    assert len(ops) < 10
+    song_c = guitarpro.patch(song_a, ops)
+    assert song_c == song_b
+    assert song_c.measureHeaders == song_b.measureHeaders
+    for track_b, track_c in zip(song_b.tracks, song_c.tracks):
+        for measure_b, measure_c in zip(track_b.measures, track_c.measures):
+            assert measure_c.header is song_c.measureHeaders[measure_c.number - 1]
+            assert measure_c.track is track_c
+            assert measure_c.start == measure_b.start
+            for voice_b, voice_c in zip(measure_b.voices, measure_c.voices):
+                assert [beat.start for beat in voice_c.beats] == [beat.start for beat in voice_b.beats]
+
+
+@pytest.mark.parametrize('filenames', [('Effects.gp4', 'Effects.gp5'), ('Chords.gp4', 'Demo v5.gp5')])
+def test_diff_songs(filenames):
+    song_a, song_b = [guitarpro.parse(path.join(LOCATION, filename)) for filename in filenames]
+    guitarpro.patch(song_a, guitarpro.diff(song_a, song_b))
+    assert song_a == song_b, guitarpro.find_difference(song_a, song_b)
@@ -0,0 +1,36 @@
+from os import path
+
+import pytest
+
+import guitarpro
+
+LOCATION = path.dirname(__file__)
+
+
+@pytest.mark.parametrize('filename', ['Effects.gp3', 'Effects.gp4', 'Mastodon - Ghost of Karelia.gp5'])
+def test_parse_measures(tmpdir, filename):
+    filepath = path.join(LOCATION, filename)
+    song = guitarpro.parse(filepath)
+    indexpath = str(tmpdir.join('index'))
+    guitarpro.index.dump(guitarpro.index.build(filepath), indexpath)
+    index = guitarpro.index.load(indexpath)
+    assert index.measureCount == len(song.measureHeaders)
+
+    measureCount = len(song.measureHeaders)
+    measures = range(measureCount // 2, measureCount + 1)
+    for index_ in [index, None]:
+        partial = guitarpro.parse_measures(filepath, tracks=[len(song.tracks)], measures=measures, index=index_)
+        track, = partial.tracks
+        assert track.number == len(song.tracks)
+        assert track.measures.isRead.count(True) == len(measures)
+        for number in measures:
+            assert track.measures[number - 1] == song.tracks[-1].measures[number - 1]
+        assert partial.measureHeaders == song.measureHeaders
+
+
+def test_index_mismatch():
+    index = guitarpro.index.build(path.join(LOCATION, 'Effects.gp5'))
+    with pytest.raises(guitarpro.GPException):
+        guitarpro.parse_measures(path.join(LOCATION, 'Demo v5.gp5'), index=index)
+    with pytest.raises(guitarpro.GPException):
+        guitarpro.index.load(b'PGPX')
@@ -0,0 +1,32 @@
+import io
+import struct
+
+import pytest
+
+from guitarpro.iobase import GPFileBase
+
+
+def reader(data):
+    return GPFileBase(io.BytesIO(data), 'cp1252')
+
+
+def test_read_many():
+    data = struct.pack('<3i2h', 1, -2, 3, 4, -5)
+    gpfile = reader(data)
+    assert gpfile.readInt(3) == [1, -2, 3]
+    assert gpfile.readShort(2) == [4, -5]
+
+
+def test_read_many_default():
+    gpfile = reader(b'\x01\x02')
+    assert gpfile.readByte(3, default=0) == [1, 2, 0]
+    gpfile = reader(b'\x01\x02')
+    with pytest.raises(struct.error):
+        gpfile.readByte(3)
+
+
+def test_read_struct():
+    data = struct.pack('<i6b2x', 25, 1, 2, 3, 4, 5, 6) + b'\x07'
+    gpfile = reader(data)
+    assert gpfile.readStruct('<i6b2x') == (25, 1, 2, 3, 4, 5, 6)
+    assert gpfile.readRecord(struct.Struct('B')) == (7,)
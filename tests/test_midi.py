@@ -0,0 +1,100 @@
+import struct
+from os import path
+
+import guitarpro
+from guitarpro import midi
+
+LOCATION = path.dirname(__file__)
+
+
+def readMidi(data):
+    """Get format, division and notes of MIDI tracks as lists of
+    ``(start, end, key, velocity)``."""
+    assert data[:4] == b'MThd'
+    _, format_, trackCount, division = struct.unpack('>IHHH', data[4:14])
+    data = bytearray(data)
+    position = 14
+    tracks = []
+    for _ in range(trackCount):
+        assert data[position:position + 4] == b'MTrk'
+        length, = struct.unpack('>I', bytes(data[position + 4:position + 8]))
+        position += 8
+        end = position + length
+        tick = 0
+        status = None
+        sounding = {}
+        notes = []
+        while position < end:
+            delta = 0
+            while True:
+                byte = data[position]
+                position += 1
+                delta = delta << 7 | byte & 0x7F
+                if not byte & 0x80:
+                    break
+            tick += delta
+            if data[position] & 0x80:
+                status = data[position]
+                position += 1
+            if status == 0xFF:
+                length = data[position + 1]
+                position += 2 + length
+                status = None
+            elif status & 0xF0 == 0xC0:
+                position += 1
+            else:
+                key, velocity = data[position:position + 2]
+                position += 2
+                if status & 0xF0 == 0x90 and velocity:
+                    assert key not in sounding
+                    sounding[key] = tick, velocity
+                elif status & 0xF0 == 0x90:
+                    start, velocity = sounding.pop(key)
+                    notes.append((start, tick, key, velocity))
+        assert not sounding
+        tracks.append(sorted(notes))
+    return format_, division, tracks
+
+
+def test_export():
+    song = guitarpro.parse(path.join(LOCATION, 'Mastodon - Curl of the Burl.gp5'))
+    format_, division, tracks = readMidi(midi.export(song))
+    assert (format_, division, len(tracks)) == (1, 960, len(song.tracks) + 1)
+    assert tracks[0] == []
+    assert all(tracks[1:])
+
+    _, _, tracks = readMidi(midi.export(song, tracks=[2]))
+    assert len(tracks) == 2
+
+
+def test_ties_and_dead_notes():
+    song = guitarpro.parse(path.join(LOCATION, 'Effects.gp5'))
+    beats = song.tracks[0].measures[0].voices[0].beats
+    beats[2].notes[0].type = guitarpro.NoteType.tie
+    _, _, tracks = readMidi(midi.export(song, tracks=[1]))
+    low = song.tracks[0].strings[5].value
+    assert tracks[1][:3] == [
+        (0, midi.DEAD_NOTE_TIME, low, beats[0].notes[0].velocity),
+        (960, 2880, low + 1, beats[1].notes[0].velocity),
+        (2880, 3840, low + 3, beats[3].notes[0].velocity),
+    ]
+
+
+def test_song_built_in_code():
+    # Beats of songs built in code have no start
+    song = guitarpro.Song()
+    track = song.tracks[0]
+    track.measures = []
+    for number in range(1, 3):
+        header = guitarpro.MeasureHeader(number=number)
+        song.addMeasureHeader(header)
+        measure = guitarpro.Measure(track, header)
+        track.measures.append(measure)
+        voice = measure.voices[0]
+        for fret in range(4):
+            beat = guitarpro.Beat(voice, status=guitarpro.BeatStatus.normal)
+            beat.notes.append(guitarpro.Note(beat, value=fret, string=1, type=guitarpro.NoteType.normal))
+            voice.beats.append(beat)
+    _, _, tracks = readMidi(midi.export(song))
+    high = track.strings[0].value
+    assert tracks[1] == [(960 * i, 960 * (i + 1), high + i % 4, guitarpro.Velocities.default) for i in range(8)]
@@ -1,6 +1,77 @@
+import copy
+import pickle
+from os import path
+
 import guitarpro
 
+LOCATION = path.dirname(__file__)
+
 
 def test_hashable():
     song = guitarpro.Song()
     hash(song)
+
+    other = guitarpro.Song()
+    assert hash(song) == hash(other)
+    other.title = 'Title'
+    assert hash(song) != hash(other)
+
+
+def test_shared_hash():
+    duration = guitarpro.Duration(value=8)
+    shared = guitarpro.share(duration)
+    assert hash(shared) == hash(duration)
+    assert shared in {duration}
+
+
+def test_find_difference():
+    filepath = path.join(LOCATION, 'Effects.gp5')
+    song_a = guitarpro.parse(filepath)
+    song_b = guitarpro.parse(filepath)
+    assert guitarpro.find_difference(song_a, song_b) is None
+    song_b.tracks[0].measures[3].voices[0].beats[1].notes[0].value += 1
+    assert song_a != song_b
+    assert guitarpro.find_difference(song_a, song_b) == 'tracks[0].measures[3].voices[0].beats[1].notes[0].value'
+    del song_b.tracks[0].measures[5:]
+    assert guitarpro.find_difference(song_a, song_b) == 'tracks[0].measures[3].voices[0].beats[1].notes[0].value'
+    song_b.tracks[0].measures[3] = song_a.tracks[0].measures[3]
+    assert guitarpro.find_difference(song_a, song_b) == 'tracks[0].measures[5]'
+
+
+def firstBeatWithNotes(song):
+    for measure in song.tracks[0].measures:
+        for beat in measure.voices[0].beats:
+            if beat.notes:
+                return beat
+
+
+def test_clone_and_pickle():
+    song = guitarpro.parse(path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5'), intern=True)
+    for copied in [song.clone(), copy.deepcopy(song), pickle.loads(pickle.dumps(song, pickle.HIGHEST_PROTOCOL))]:
+        assert copied == song
+        assert guitarpro.write(copied) == guitarpro.write(song)
+        track = copied.tracks[0]
+        measure = track.measures[1]
+        assert track.song is copied and measure.track is track
+        assert measure.header is copied.measureHeaders[1] and measure.header.song is copied
+        beat = firstBeatWithNotes(copied)
+        assert beat.voice.measure.track is track and beat.notes[0].beat is beat
+        beat.notes[0].value += 1
+        assert copied != song
+
+    # Models are copied without their parents
+    beat = firstBeatWithNotes(song)
+    for copied in [copy.deepcopy(beat), pickle.loads(pickle.dumps(beat))]:
+        assert copied == beat and copied.voice is None and copied.notes[0].beat is copied
+
+    # Shallow copies don't take children from the original
+    copied = copy.copy(beat)
+    assert copied.voice is beat.voice and beat.notes[0].beat is beat
+
+
+def test_pickle_incomplete_songs():
+    song = guitarpro.Song()
+    assert pickle.loads(pickle.dumps(song)) == song
+    song = guitarpro.parse(path.join(LOCATION, 'Effects.gp5'), depth='tracks')
+    assert pickle.loads(pickle.dumps(song)) == song
+    assert song.clone() == song
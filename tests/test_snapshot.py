@@ -0,0 +1,51 @@
+import struct
+from os import path
+
+import pytest
+
+import guitarpro
+from guitarpro import snapshot
+
+LOCATION = path.dirname(__file__)
+FILES = ['Effects.gp3', 'Effects.gp4', 'Effects.gp5', 'Chords.gp5', 'Mastodon - Ghost of Karelia.gp5']
+
+
+@pytest.mark.parametrize('filename', FILES)
+def test_round_trip(filename):
+    expected = guitarpro.parse(path.join(LOCATION, filename))
+    data = snapshot.dumps(expected)
+    song = snapshot.loads(data)
+    assert song == expected
+    assert song.version == expected.version
+    assert guitarpro.write(song) == guitarpro.write(expected)
+    measure = song.tracks[-1].measures[-1]
+    assert measure.track is song.tracks[-1] and measure.header is song.measureHeaders[-1]
+    assert snapshot.loads(bytearray(data), lazy=True) == expected
+
+
+def test_measures_without_headers():
+    song = guitarpro.Song()
+    assert snapshot.loads(snapshot.dumps(song)) == song
+    song = guitarpro.parse(path.join(LOCATION, 'Effects.gp5'), depth='tracks')
+    assert snapshot.loads(snapshot.dumps(song)) == song
+    assert snapshot.loads(snapshot.dumps(song), lazy=True) == song
+
+
+def test_columns_without_cast():
+    # Memory views of Python 2 can't be cast, columns are copied instead
+    class View(object):
+        def __init__(self, data):
+            self.data = data
+
+        def tobytes(self):
+            return self.data
+
+    column = snapshot._column(View(struct.pack('<3i', 1, -2, 300000)), 'i')
+    assert list(column) == [1, -2, 300000]
+
+
+def test_broken():
+    data = snapshot.dumps(guitarpro.parse(path.join(LOCATION, 'Effects.gp5')))
+    for broken in [b'', b'song', data[:100], data[:6] + b'\xff' + data[7:]]:
+        with pytest.raises(ValueError):
+            snapshot.loads(broken)
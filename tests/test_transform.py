@@ -0,0 +1,67 @@
+from os import path
+
+import pytest
+
+import guitarpro
+from guitarpro import transform
+
+LOCATION = path.dirname(__file__)
+
+
+def iterNotes(song):
+    for track in song.tracks:
+        for measure in track.measures:
+            for voice in measure.voices:
+                for beat in voice.beats:
+                    for note in beat.notes:
+                        yield note
+
+
+def test_transpose():
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    song = guitarpro.parse(filepath)
+    assert transform.transpose(song, 2, strings=[5, 6]) == []
+    assert song != guitarpro.parse(filepath)
+    assert transform.transpose(song, -2, strings=[5, 6]) == []
+    assert song == guitarpro.parse(filepath)
+
+
+def test_transpose_out_of_range():
+    song = guitarpro.parse(path.join(LOCATION, 'Effects.gp5'))
+    fretCount = song.tracks[0].fretCount
+    outOfRange = transform.transpose(song, 2)
+    assert outOfRange
+    for index in outOfRange:
+        assert len(index) == 5 and index[0] == 0
+        note = transform.note_at(song, index)
+        assert note.type == guitarpro.NoteType.dead and note.value == fretCount
+    assert guitarpro.parse(guitarpro.write(song)) == song
+
+
+def test_retune():
+    filepath = path.join(LOCATION, 'Mastodon - Ghost of Karelia.gp5')
+    song = guitarpro.parse(filepath)
+    pitches = [note.realValue for note in iterNotes(song) if note.type == guitarpro.NoteType.normal]
+    outOfRange = transform.retune(song, [62, 57, 53, 48, 43, 36], tracks=[1])
+    assert song.tracks[0].strings[5].value == 36
+    expected = [note.realValue for note in iterNotes(song) if note.type == guitarpro.NoteType.normal]
+    assert outOfRange == []
+    assert pitches == expected
+
+    # Bass track has 4 strings, first track is left as it is
+    with pytest.raises(ValueError):
+        transform.retune(song, [64, 59, 55, 50, 45, 40], tracks=[1, 3])
+    assert song.tracks[0].strings[5].value == 36
+
+
+def test_remap_and_scale_velocity():
+    filepath = path.join(LOCATION, 'Effects.gp5')
+    song = guitarpro.parse(filepath)
+    track = song.tracks[0]
+    values = [note.value for note in iterNotes(song)]
+    transform.remap(song, {value: value + 1 for value in values}, tracks=[track.number])
+    assert [note.value for note in iterNotes(song)] == [value + 1 for value in values]
+
+    velocities = [note.velocity for note in iterNotes(song)]
+    transform.scale_velocity(song, 2)
+    assert [note.velocity for note in iterNotes(song)] == [min(127, velocity * 2) for velocity in velocities]